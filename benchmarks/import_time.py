@@ -0,0 +1,92 @@
+"""
+Measure how long `import wealthaccess` takes in a fresh interpreter and
+check it doesn't drag in heavy dependencies.
+
+    python benchmarks/import_time.py --runs 20 --max-ms 15
+
+Exits with status 1 when the median import time goes over --max-ms or a
+module in HEAVY_MODULES was imported, so it can run in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only be imported once a request is actually made
+HEAVY_MODULES = (
+    "aiohttp",
+    "asyncio",
+    "concurrent.futures",
+    "pandas",
+    "pyarrow",
+    "pytz",
+    "requests",
+    "sqlite3",
+    "urllib3",
+)
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import wealthaccess
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "modules": sorted(sys.modules)}))
+"""
+
+_BASELINE = """
+import json, sys
+print(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+
+def _run(script):
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    baseline = set(_run(_BASELINE)["modules"])
+    # The first run warms the bytecode cache and isn't counted
+    _run(_SCRIPT)
+    results = [_run(_SCRIPT) for _ in range(args.runs)]
+    timings = sorted(result["ms"] for result in results)
+    imported = set(results[-1]["modules"]) - baseline
+    heavy = sorted(
+        m for m in imported if m.split(".")[0] in HEAVY_MODULES or m in HEAVY_MODULES
+    )
+    median = statistics.median(timings)
+
+    print(f"import wealthaccess ({args.runs} runs)")
+    print(f"  median: {median:.2f} ms")
+    print(f"  min:    {timings[0]:.2f} ms")
+    print(f"  max:    {timings[-1]:.2f} ms")
+    print(f"  modules imported: {len(imported)}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median {median:.2f} ms is over {args.max_ms:.2f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
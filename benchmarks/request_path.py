@@ -0,0 +1,234 @@
+"""
+Benchmark the request path against the local stub Wealth Access server.
+
+    python benchmarks/request_path.py --requests 500 --concurrency 16 \\
+        --key AdvisorInvestorHoldings --records 1000
+
+Every route is first requested once to check the stub accepts the package's
+signatures.  Each mode then runs in its own interpreter so peak RSS is
+measured separately:
+
+    sequential  a new connection for every request, one at a time
+    pooled      one keep-alive Client, one request at a time
+    threaded    one Client shared by --concurrency threads
+    async       one AsyncClient with --concurrency requests in flight
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_server  # noqa: E402
+from wealthaccess.endpoints import ENDPOINTS  # noqa: E402
+
+
+MODES = ("sequential", "pooled", "threaded", "async")
+
+URI_PARAMS = {"investor_id": 1, "vault_file_id": 1}
+
+
+def _credentials():
+    from wealthaccess import Credentials
+
+    return Credentials(
+        stub_server.API_KEY, stub_server.SECRET_KEY, stub_server.USER_GUID
+    )
+
+
+def check_routes(url):
+    """
+    Request every endpoint once and return the keys the stub rejected.
+    """
+    from wealthaccess import Client
+    from wealthaccess.private import get_data
+
+    failed = []
+    with Client(base_url=url, credentials=_credentials()) as client:
+        for key in ENDPOINTS:
+            method = "POST" if key.endswith("Post") else "GET"
+            query_params = {"startDate": "2020-01-01", "ignoreOrion": True}
+            response = get_data(key, method, URI_PARAMS, query_params, client=client)
+            if not response.ok:
+                failed.append(f"{key} ({response.status_code})")
+    return failed
+
+
+def _timed(func, latencies, decode):
+    start = perf_counter()
+    response = func()
+    response.raise_for_status()
+    if decode:
+        response.json()
+    latencies.append(perf_counter() - start)
+
+
+def _run_sync(mode, url, key, requests, concurrency, decode):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from wealthaccess import Client
+    from wealthaccess.private import get_data
+
+    client = Client(
+        base_url=url,
+        credentials=_credentials(),
+        keep_alive=mode != "sequential",
+        pool_maxsize=max(concurrency, 10),
+    )
+    latencies = []
+
+    def one(_=None):
+        _timed(
+            lambda: get_data(key, "GET", URI_PARAMS, client=client), latencies, decode
+        )
+
+    start = perf_counter()
+    if mode == "threaded":
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(one, range(requests)))
+    else:
+        for _ in range(requests):
+            one()
+    elapsed = perf_counter() - start
+    client.close()
+    return latencies, elapsed
+
+
+def _run_async(url, key, requests, concurrency, decode):
+    import asyncio
+
+    from wealthaccess import aio
+
+    async def run():
+        latencies = []
+        # Requests wait for a slot here rather than in the client, so their
+        # latency is timed from when they go out, as in the threaded mode
+        slots = asyncio.Semaphore(concurrency)
+        async with aio.AsyncClient(
+            base_url=url, credentials=_credentials(), max_concurrency=concurrency
+        ) as client:
+
+            async def one():
+                async with slots:
+                    start = perf_counter()
+                    response = await aio.get_data(
+                        key, "GET", URI_PARAMS, client=client
+                    )
+                    response.raise_for_status()
+                    if decode:
+                        response.json()
+                    latencies.append(perf_counter() - start)
+
+            start = perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            return latencies, perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def worker(args):
+    if args.mode == "async":
+        latencies, elapsed = _run_async(
+            args.url, args.key, args.requests, args.concurrency, args.decode
+        )
+    else:
+        latencies, elapsed = _run_sync(
+            args.mode, args.url, args.key, args.requests, args.concurrency, args.decode
+        )
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "mode": args.mode,
+                "requests_per_second": len(latencies) / elapsed,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+        )
+    )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--key", default="AdvisorInvestorHoldings")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--size", action="append", metavar="KEY=N")
+    parser.add_argument("--decode", action="store_true", help="decode every body")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return worker(args)
+
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    if args.key not in ENDPOINTS:
+        parser.error(f"unknown endpoint key {args.key!r}")
+
+    server = stub_server.StubServer(
+        ("127.0.0.1", 0),
+        records=args.records,
+        sizes=stub_server.parse_sizes(args.size),
+    ).start()
+    failed = check_routes(server.url)
+    if failed:
+        print(f"FAIL: the stub rejected {', '.join(failed)}")
+        return 1
+    # Rendering the payload here keeps it out of the timings
+    body_kb = len(server.body(args.key)) / 1024
+    print(f"{args.key}: {body_kb:,.1f} KB, {args.requests} requests per mode")
+    print(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>14}")
+
+    for mode in modes:
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--mode",
+            mode,
+            "--url",
+            server.url,
+            "--key",
+            args.key,
+            "--requests",
+            str(args.requests),
+            "--concurrency",
+            str(args.concurrency),
+        ]
+        if args.decode:
+            command.append("--decode")
+        result = json.loads(
+            subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        )
+        print(
+            f"{mode:<12}{result['requests_per_second']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['peak_rss_mb']:>14.1f}"
+        )
+        # Let sockets left in TIME_WAIT by the previous mode settle
+        time.sleep(0.5)
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""
+Local stand-in for the Wealth Access API.
+
+Serves every route in `wealthaccess.endpoints.ENDPOINTS`, rejects requests
+whose WAS signature or timestamp doesn't check out the way the real API
+would, and answers with synthetic JSON records.  Payload sizes are set per
+endpoint key, and each payload is rendered once and reused.
+
+    python benchmarks/stub_server.py --port 8000 --records 1000 \\
+        --size Investors=10000 --size Transactions=1000000
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Formatter
+from urllib.parse import parse_qsl, urlsplit
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from wealthaccess.endpoints import ENDPOINTS  # noqa: E402
+
+
+API_KEY = "stub-api-key"
+SECRET_KEY = "stub-secret-key"
+USER_GUID = "00000000-0000-0000-0000-000000000000"
+
+# Largest difference allowed between x-WATimestamp and the server's clock
+MAX_SKEW = 300
+
+# Endpoints answering with a single object rather than a list
+_OBJECTS = (
+    "AdvisorInvestorProfile",
+    "InvestorProfile",
+    "AdvisorInvestorDocumentPost",
+)
+
+
+def _route(endpoint):
+    pattern = "".join(
+        re.escape(literal) + ("[^/]+" if field else "")
+        for literal, field, _, _ in Formatter().parse(endpoint.uri)
+    )
+    method = "POST" if endpoint.key.endswith("Post") else "GET"
+    return method, re.compile(f"{pattern}$", re.IGNORECASE), endpoint.key
+
+
+_ROUTES = [_route(endpoint) for endpoint in ENDPOINTS.values()]
+
+
+def _date(i):
+    return f"20{10 + i % 10:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+
+
+def make_record(key, i):
+    """
+    Returns the i-th synthetic record for the endpoint key.
+    """
+    if key in ("Investors", "FirmInvestors"):
+        return {
+            "investorId": i,
+            "clientIdentifier": f"C{i:08d}",
+            "firstName": f"First{i}",
+            "lastName": f"Last{i}",
+            "email": f"investor{i}@example.com",
+        }
+    if "Transactions" in key:
+        return {
+            "transactionId": i,
+            "accountId": i % 997,
+            "transactionDate": _date(i),
+            "description": f"Transaction {i}",
+            "amount": round((i % 10000) * 1.37 - 5000, 2),
+            "quantity": i % 100,
+            "price": round(i % 500 * 0.97, 2),
+            "isTransfer": i % 7 == 0,
+        }
+    if "Holdings" in key:
+        return {
+            "holdingId": i,
+            "accountId": i % 997,
+            "symbol": f"SYM{i % 5000}",
+            "quantity": i % 1000,
+            "price": round(i % 500 * 0.97, 2),
+            "marketValue": round((i % 1000) * (i % 500) * 0.97, 2),
+            "costBasis": round((i % 1000) * (i % 400) * 0.91, 2),
+            "asOfDate": _date(i),
+        }
+    if "Accounts" in key:
+        return {
+            "accountId": i,
+            "accountNumber": f"A{i:010d}",
+            "name": f"Account {i}",
+            "balance": round(i % 100000 * 1.11, 2),
+            "marketValue": round(i % 100000 * 1.23, 2),
+            "openDate": _date(i),
+            "isClosed": i % 50 == 0,
+        }
+    if key in ("Classifications", "Diversifications"):
+        return {
+            "id": i,
+            "name": f"{key[:-1]} {i}",
+            "categories": [
+                {"categoryId": i * 10 + c, "name": f"Category {c}"} for c in range(4)
+            ],
+        }
+    if key.startswith("AdvisorInvestorDocuments"):
+        return {
+            "vaultFileId": i,
+            "parentId": i // 10,
+            "name": f"document-{i}.pdf",
+            "isFolder": i % 10 == 0,
+            "size": i * 1024,
+        }
+    return {"id": i, "name": f"{key} {i}"}
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server for the stub API.
+
+    Arguments
+    ---------
+    address: tuple, required
+        (host, port) to listen on, port 0 for any free port
+
+    Keyword Arguments
+    -----------------
+    records: int, default 100, optional
+        Records in each list response
+    sizes: dict, default None, optional
+        Records by endpoint key, overriding `records`
+    api_key, secret_key, user_guid: str, optional
+        Credentials requests must be signed with
+    failures: dict, default None, optional
+        Number of requests by endpoint key answered with a 503 (and
+        Retry-After: 0) before it succeeds, for exercising retries.  Set
+        failure_status and retry_after to answer them differently.
+    document_size: int, default 100000, optional
+        Size of the document the document detail endpoint serves, with
+        Range support.  Set honor_range to False to have it ignored, and
+        drop_after (or cut_short) to a number of bytes to have the next
+        response's connection dropped after that many bytes (or the
+        response end that many bytes early).
+
+    The headers and body of every verified POST are kept in `uploads`, and
+    every response is held back by `delay` seconds.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        address,
+        records=100,
+        sizes=None,
+        api_key=API_KEY,
+        secret_key=SECRET_KEY,
+        user_guid=USER_GUID,
+        failures=None,
+        document_size=100000,
+    ):
+        super().__init__(address, _Handler)
+        self.records = records
+        self.sizes = sizes or {}
+        self.api_key = api_key
+        self.secret_key = secret_key.encode("utf-8")
+        self.user_guid = user_guid
+        self.failures = dict(failures or {})
+        self.failure_status = 503
+        self.retry_after = 0
+        self.document = bytes(i % 251 for i in range(document_size))
+        self.honor_range = True
+        self.drop_after = None
+        self.cut_short = None
+        self.ranges = []
+        self.uploads = []
+        self.delay = 0
+        self.rejected = 0
+        self.connections = 0
+        self.requests = {}
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def body(self, key):
+        body = self._bodies.get(key)
+        if body is None:
+            with self._lock:
+                body = self._bodies.get(key)
+                if body is None:
+                    if key in _OBJECTS:
+                        payload = make_record(key, 1)
+                    else:
+                        n = self.sizes.get(key, self.records)
+                        payload = [make_record(key, i) for i in range(1, n + 1)]
+                    body = self._bodies[key] = json.dumps(payload).encode("utf-8")
+        return body
+
+    def body_after(self, key, transaction_id):
+        """
+        Renders the key's records with a transactionId above the given one,
+        the way the API answers an incremental request.
+        """
+        n = self.sizes.get(key, self.records)
+        payload = [make_record(key, i) for i in range(transaction_id + 1, n + 1)]
+        return json.dumps(payload).encode("utf-8")
+
+    def fail(self, key):
+        """
+        Count a verified request for the key and return whether it should
+        fail.
+        """
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if self.failures.get(key, 0) > 0:
+                self.failures[key] -= 1
+                return True
+        return False
+
+    def verify(self, method, path, query, headers):
+        """
+        Returns why the request's authentication headers are invalid, or
+        None when they're valid.
+        """
+        if headers.get("x-WAApiKey") != self.api_key:
+            return "Unknown API key"
+        gmt_time = headers.get("x-WATimestamp")
+        try:
+            sent = parsedate_to_datetime(gmt_time).timestamp()
+        except (TypeError, ValueError):
+            return "Invalid timestamp"
+        if abs(time.time() - sent) > MAX_SKEW:
+            return "Expired timestamp"
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        sorted_params = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        string = f"{self.api_key}\n{method}\n{gmt_time}\n{path}\n{sorted_params}"
+        digest = hmac.new(self.secret_key, string.encode("utf-8"), hashlib.sha256)
+        signature = base64.b64encode(digest.digest()).decode("utf-8")
+        expected = f"WAS {self.user_guid}:{signature}"
+        if not hmac.compare_digest(headers.get("Authorization", ""), expected):
+            return "Invalid signature"
+        return None
+
+    def start(self):
+        """
+        Serve from a daemon thread and return the server.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Without TCP_NODELAY, Nagle plus delayed ACKs hold each keep-alive
+    # response back by ~40ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def _read_body(self):
+        # Read all of it, so the connection can be reused
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            chunks.append(self.rfile.read(size + 2)[:size])
+            if not size:
+                return b"".join(chunks)
+
+    def _handle(self):
+        body = self._read_body()
+        url = urlsplit(self.path)
+        key = next(
+            (
+                k
+                for method, route, k in _ROUTES
+                if method == self.command and route.match(url.path)
+            ),
+            None,
+        )
+        if key is None:
+            return self._send(404, {"message": "Not found"})
+        error = self.server.verify(self.command, url.path, url.query, self.headers)
+        if error is not None:
+            self.server.rejected += 1
+            return self._send(401, {"message": error})
+        if self.command == "POST":
+            self.server.uploads.append((self.headers, body))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.fail(key):
+            return self._send(
+                self.server.failure_status,
+                {"message": "Unavailable"},
+                [("Retry-After", str(self.server.retry_after))],
+            )
+        if key == "AdvisorInvestorDocumentsDetail":
+            return self._send_document()
+        after = dict(parse_qsl(url.query)).get("transactionId")
+        if "Transactions" in key and after is not None:
+            return self._send(200, self.server.body_after(key, int(after)))
+        self._send(200, self.server.body(key))
+
+    do_GET = do_POST = _handle
+
+    def _send_document(self):
+        server = self.server
+        document, size = server.document, len(server.document)
+        requested = self.headers.get("Range")
+        server.ranges.append(requested)
+        match = re.fullmatch(r"bytes=(\d+)-", requested or "")
+        if match is None or not server.honor_range:
+            status, start, headers = 200, 0, []
+        elif int(match.group(1)) >= size:
+            return self._send(416, b"", [("Content-Range", f"bytes */{size}")])
+        else:
+            start = int(match.group(1))
+            status = 206
+            headers = [("Content-Range", f"bytes {start}-{size - 1}/{size}")]
+        body = document[start:]
+        if server.cut_short is not None:
+            body, server.cut_short = body[: -server.cut_short], None
+        drop_after, server.drop_after = server.drop_after, None
+        headers.append(("Content-Type", "application/octet-stream"))
+        self._send(status, body, headers, drop_after)
+
+    def _send(self, status, body, headers=(), drop_after=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        names = {name.lower() for name, _ in headers}
+        if "content-type" not in names:
+            self.send_header("Content-Type", "application/json")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection", "").lower() == "close":
+            # Also makes the handler close the socket after this response
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if drop_after is not None:
+            body = body[:drop_after]
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def parse_sizes(values):
+    sizes = {}
+    for value in values or ():
+        key, _, n = value.partition("=")
+        if key not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint key {key!r}")
+        sizes[key] = int(n)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--size", action="append", metavar="KEY=N")
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port), records=args.records, sizes=parse_sizes(args.size)
+    )
+    print(f"Serving the Wealth Access stub on {server.url}")
+    print(f"WA_API_KEY={API_KEY} WA_SECRET_KEY={SECRET_KEY} WA_USER_GUID={USER_GUID}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,21 @@
 from setuptools import setup, find_packages
 
 INSTALL_REQUIRES = [
-    'pytz==2020.1',
     'requests==2.24.0'
 ]
 
+ASYNC_REQUIRES = [
+    'aiohttp>=3.7',
+]
+
+PANDAS_REQUIRES = [
+    'pandas>=2.0',
+]
+
+ARROW_REQUIRES = [
+    'pyarrow>=3.0',
+]
+
 TEST_REQUIRES = [
     # testing and coverage
     'pytest', 'coverage', 'pytest-cov',
@@ -26,6 +37,9 @@ setup(
     url="https://github.com/dpguthrie/wealthaccess",
     install_requires=INSTALL_REQUIRES,
     extras_require={
+        'async': ASYNC_REQUIRES,
+        'pandas': PANDAS_REQUIRES,
+        'pyarrow': ARROW_REQUIRES,
         'test': TEST_REQUIRES + INSTALL_REQUIRES,
     },
     classifiers=[
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from stub_server import API_KEY, SECRET_KEY, USER_GUID, StubServer  # noqa: E402
+
+from wealthaccess.auth import Credentials  # noqa: E402
+from wealthaccess.client import Client  # noqa: E402
+
+
+KEYS = {"WA_API_KEY": API_KEY, "WA_SECRET_KEY": SECRET_KEY, "WA_USER_GUID": USER_GUID}
+
+
+class Clock:
+    """
+    Stands in for the time module, sleeping by moving the clock on.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in KEYS:
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def stub():
+    server = StubServer(("127.0.0.1", 0), records=10).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def credentials():
+    return Credentials(API_KEY, SECRET_KEY, USER_GUID)
+
+
+@pytest.fixture
+def client(stub, credentials):
+    client = Client(base_url=stub.url, credentials=credentials)
+    yield client
+    client.close()
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from conftest import KEYS
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from wealthaccess import aio  # noqa: E402
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_keys_as_kwargs_without_environment(stub, clean_env):
+    async def main():
+        async with aio.AsyncClient(base_url=stub.url) as client:
+            response = await aio.get_data(
+                "Accounts", "GET", query_params=dict(KEYS), client=client
+            )
+            return response, client._signer
+
+    response, signer = run(main())
+    assert response.status_code == 200
+    assert signer is None
+
+
+def test_concurrent_requests(stub, credentials):
+    async def main():
+        async with aio.AsyncClient(
+            base_url=stub.url, credentials=credentials, max_concurrency=4
+        ) as client:
+            return await asyncio.gather(
+                *(aio.get_advisor_holdings(client=client) for _ in range(20))
+            )
+
+    responses = run(main())
+    assert {response.status_code for response in responses} == {200}
+    assert stub.rejected == 0
+
+
+def test_new_loop_closes_the_previous_session(stub, credentials):
+    client = aio.AsyncClient(base_url=stub.url, credentials=credentials)
+    assert run(aio.get_advisor_holdings(client=client)).status_code == 200
+    previous = client._session
+    assert run(aio.get_advisor_holdings(client=client)).status_code == 200
+    assert previous.closed
+    assert client._session is not previous
+    run(client.close())
+
+
+def test_output(stub, credentials):
+    async def main():
+        client = aio.AsyncClient(base_url=stub.url, credentials=credentials)
+        async with client:
+            records = await aio.get_advisor_holdings(client=client, output="records")
+            models = await aio.get_advisor_holdings(client=client, output="models")
+            snapshot = await aio.get_investor_snapshot(
+                1, parts=("holdings",), client=client, output="dataframe"
+            )
+            return records, models, snapshot
+
+    records, models, snapshot = run(main())
+    assert len(records) == 10
+    assert models[0].holding_id == records[0]["holdingId"]
+    assert snapshot.holdings == records
+
+
+def test_errors_describe_their_request(stub, clean_env):
+    keys = dict(KEYS, WA_SECRET_KEY="wrong")
+
+    async def main():
+        async with aio.AsyncClient(base_url=stub.url) as client:
+            snapshot = await aio.get_investor_snapshot(
+                1, parts=("holdings",), client=client, **keys
+            )
+            with pytest.raises(aiohttp.ClientResponseError) as info:
+                await aio.get_advisor_holdings(client=client, output="records", **keys)
+            return snapshot, info.value
+
+    snapshot, error = run(main())
+    assert error.status == 401
+    assert "/api/v2/advisor/holdings" in str(error)
+    assert "401" in str(snapshot.errors["holdings"])
+
+
+def test_classes_only_close_clients_they_built(stub, credentials):
+    async def main():
+        shared = aio.AsyncClient(base_url=stub.url, credentials=credentials)
+        async with shared:
+            async with aio.AsyncAdvisor(client=shared) as advisor:
+                await advisor.get_advisor_holdings()
+            assert not shared.closed
+            owned = aio.AsyncAdvisor(base_url=stub.url, credentials=credentials)
+            async with owned as advisor:
+                response = await advisor.get_advisor_holdings()
+            return response, owned.client
+
+    response, client = run(main())
+    assert response.status_code == 200
+    assert client.closed
@@ -0,0 +1,44 @@
+from wealthaccess.book import BookIndex
+
+
+ACCOUNTS = [{"accountNumber": f"A{i}", "investorId": i % 3} for i in range(6)]
+
+
+def holdings(n):
+    return [
+        {
+            "accountNumber": f"A{i % 6}",
+            "symbol": f"S{i}",
+            "classification": "Equity" if i % 2 else "Bond",
+            "marketValue": float((i * 7) % n),
+        }
+        for i in range(n)
+    ]
+
+
+def market_values(book, low=None, high=None):
+    return [h["marketValue"] for h in book.holdings_between("marketValue", low, high)]
+
+
+def test_load_sorts_once():
+    book = BookIndex()
+    counts = book.load(holdings(50), ACCOUNTS)
+    assert counts["holdings"] == {"added": 50, "changed": 0, "removed": 0}
+    assert market_values(book) == sorted(market_values(book))
+    assert market_values(book, 10, 12) == [10.0, 11.0, 12.0]
+    assert len(book.holdings(investorId=1)) == len(
+        [h for h in holdings(50) if int(h["accountNumber"][1:]) % 3 == 1]
+    )
+
+
+def test_refresh_updates_indexes_incrementally():
+    book = BookIndex()
+    book.load(holdings(50), ACCOUNTS)
+    changed = holdings(50)[:-5]
+    changed[0]["marketValue"] = 1000.0
+    counts = book.load(changed, ACCOUNTS)
+    assert counts["holdings"] == {"added": 0, "changed": 1, "removed": 5}
+    values = market_values(book)
+    assert values == sorted(values) and values[-1] == 1000.0
+    totals = book.holding_totals("classification")
+    assert sum(totals.values()) == sum(h["marketValue"] for h in changed)
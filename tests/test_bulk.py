@@ -0,0 +1,37 @@
+import requests
+
+from wealthaccess import bulk
+from wealthaccess.client import Client, set_client
+
+from conftest import KEYS
+
+
+def test_fan_out_records(client):
+    previous = set_client(client)
+    try:
+        results = dict(bulk.get_all_investor_holdings([1, 2], output="records"))
+    finally:
+        set_client(previous)
+    assert sorted(results) == [1, 2]
+    assert all(isinstance(result, list) for result in results.values())
+
+
+def test_fan_out_failure_is_yielded(client):
+    previous = set_client(client)
+    try:
+        keys = dict(KEYS, WA_API_KEY="x")
+        results = dict(bulk.get_all_investor_holdings([1], **keys))
+    finally:
+        set_client(previous)
+    assert isinstance(results[1], requests.HTTPError)
+
+
+def test_profiles_take_keys(stub, clean_env):
+    previous = set_client(Client(base_url=stub.url))
+    try:
+        results = dict(
+            bulk.get_all_investor_profiles([1, 2], output="records", **KEYS)
+        )
+    finally:
+        set_client(previous)
+    assert all(isinstance(result, dict) for result in results.values())
@@ -0,0 +1,200 @@
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+from requests import Response
+
+from wealthaccess import cache
+from wealthaccess.cache import MemoryCache, SQLiteCache
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+
+from conftest import Clock
+
+
+def _response(content=b"[]"):
+    response = Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = content
+    response.url = "http://example.com/api"
+    return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_sqlite_entries_expire_into_the_stale_window(clock, tmp_path):
+    sqlite = SQLiteCache(str(tmp_path / "cache.db"), ttls={"Holdings": 10}, stale_ttl=5)
+    sqlite.set("a", "Holdings", _response(b"[1]"))
+    response = sqlite.get("a")
+    assert response.content == b"[1]" and not response.stale
+    clock.now += 12
+    assert sqlite.get("a").stale
+    clock.now += 3
+    assert sqlite.get("a") is None
+    assert sqlite.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+
+def test_sqlite_only_caches_endpoints_with_a_ttl(tmp_path):
+    sqlite = SQLiteCache(str(tmp_path / "cache.db"), ttls={"Holdings": 10})
+    sqlite.set("a", "Accounts", _response())
+    assert len(sqlite) == 0
+
+
+def test_sqlite_purge_drops_what_is_past_the_stale_window(clock, tmp_path):
+    sqlite = SQLiteCache(
+        str(tmp_path / "cache.db"), ttls={"Holdings": 10, "Accounts": 100}, stale_ttl=5
+    )
+    sqlite.set("holdings", "Holdings", _response())
+    sqlite.set("accounts", "Accounts", _response())
+    clock.now += 12
+    sqlite.purge()
+    assert len(sqlite) == 2
+    clock.now += 10
+    sqlite.purge()
+    assert len(sqlite) == 1
+    assert sqlite.get("accounts") is not None
+
+
+def test_sqlite_max_entries_drops_the_oldest(clock, tmp_path):
+    sqlite = SQLiteCache(str(tmp_path / "cache.db"), ttl=60, max_entries=3)
+    for key in "abcde":
+        sqlite.set(key, "Holdings", _response())
+        clock.now += 1
+    assert len(sqlite) == 3
+    assert [k for k in "abcde" if sqlite.get(k) is not None] == ["c", "d", "e"]
+
+
+def test_sqlite_invalidate(tmp_path):
+    sqlite = SQLiteCache(str(tmp_path / "cache.db"), ttl=60)
+    for key, endpoint_key in [("a", "Holdings"), ("b", "Accounts"), ("c", "Other")]:
+        sqlite.set(key, endpoint_key, _response())
+    sqlite.invalidate("Holdings", "Accounts")
+    assert [k for k in "abc" if sqlite.get(k) is not None] == ["c"]
+    sqlite.invalidate()
+    assert len(sqlite) == 0
+
+
+def _set_in_child(sqlite):
+    sqlite.set("child", "Holdings", _response(b"[2]"))
+
+
+def test_sqlite_is_shared_across_processes(tmp_path):
+    sqlite = SQLiteCache(str(tmp_path / "cache.db"), ttl=60)
+    sqlite.set("parent", "Holdings", _response(b"[1]"))
+    # The child opens its own connection instead of using the inherited one
+    process = multiprocessing.get_context("fork").Process(
+        target=_set_in_child, args=(sqlite,)
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert sqlite.get("child").content == b"[2]"
+    assert sqlite.get("parent").content == b"[1]"
+
+
+def test_stale_hit_refetches_once_in_the_background(stub, credentials, tmp_path):
+    path = str(tmp_path / "cache.db")
+    sqlite = SQLiteCache(path, ttls={"Holdings": 60}, stale_ttl=600)
+    with Client(base_url=stub.url, credentials=credentials, cache=sqlite) as client:
+        fresh = get_data("Holdings", "GET", client=client)
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE responses SET expires_at = ?", (time.time() - 1,))
+        stub.delay = 0.2
+        stale = [get_data("Holdings", "GET", client=client) for _ in range(5)]
+        assert all(response.stale for response in stale)
+        assert [r.content for r in stale] == [fresh.content] * 5
+        _wait_until(lambda: not client._revalidating)
+        assert not get_data("Holdings", "GET", client=client).stale
+    assert stub.requests["Holdings"] == 2
+
+
+def test_memory_entries_expire(clock):
+    memory = MemoryCache(ttls={"Holdings": 10})
+    memory.set("a", "Holdings", _response())
+    clock.now += 9
+    assert memory.get("a") is not None
+    clock.now += 1
+    assert memory.get("a") is None
+    assert len(memory) == 0
+    assert memory.stats()["bytes"] == 0
+
+
+def test_memory_only_caches_endpoints_with_a_ttl():
+    memory = MemoryCache(ttls={"Holdings": 10})
+    memory.set("a", "Accounts", _response())
+    assert memory.get("a") is None
+    assert memory.stats()["misses"] == 1
+
+
+def test_memory_evicts_the_least_recently_used():
+    memory = MemoryCache(ttl=60, max_entries=2)
+    memory.set("a", "Holdings", _response())
+    memory.set("b", "Holdings", _response())
+    memory.get("a")
+    memory.set("c", "Holdings", _response())
+    assert [k for k in "abc" if memory.get(k) is not None] == ["a", "c"]
+    assert memory.stats() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "entries": 2,
+        "bytes": 4,
+    }
+
+
+def test_memory_evicts_down_to_max_bytes():
+    memory = MemoryCache(ttl=60, max_bytes=10)
+    memory.set("a", "Holdings", _response(b"aaaa"))
+    memory.set("b", "Holdings", _response(b"bbbb"))
+    memory.set("c", "Holdings", _response(b"cccc"))
+    assert [k for k in "abc" if memory.get(k) is not None] == ["b", "c"]
+    assert memory.stats()["bytes"] == 8
+    assert memory.stats()["evictions"] == 1
+    # Larger than the whole cache, so never stored
+    memory.set("d", "Holdings", _response(b"d" * 11))
+    assert memory.get("d") is None
+    assert len(memory) == 2
+
+
+def test_memory_replacing_an_entry_keeps_the_size_right():
+    memory = MemoryCache(ttl=60)
+    memory.set("a", "Holdings", _response(b"aaaa"))
+    memory.set("a", "Holdings", _response(b"aa"))
+    assert memory.stats()["bytes"] == 2
+    assert len(memory) == 1
+
+
+def test_memory_invalidate():
+    memory = MemoryCache(ttl=60)
+    for key, endpoint_key in [("a", "Holdings"), ("b", "Accounts"), ("c", "Other")]:
+        memory.set(key, endpoint_key, _response(b"xx"))
+    memory.invalidate("Holdings", "Accounts")
+    assert [k for k in "abc" if memory.get(k) is not None] == ["c"]
+    assert memory.stats()["bytes"] == 2
+    memory.invalidate()
+    assert len(memory) == 0
+    assert memory.stats()["bytes"] == 0
+
+
+def test_client_serves_repeats_from_memory(stub, credentials):
+    memory = MemoryCache(ttls={"Holdings": 60})
+    with Client(base_url=stub.url, credentials=credentials, cache=memory) as client:
+        first = get_data("Holdings", "GET", client=client)
+        assert get_data("Holdings", "GET", client=client) is first
+        get_data("Accounts", "GET", client=client)
+        get_data("Accounts", "GET", client=client)
+    assert stub.requests == {"Holdings": 1, "Accounts": 2}
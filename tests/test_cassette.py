@@ -0,0 +1,60 @@
+import pytest
+
+from wealthaccess.cassette import Cassette
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+from wealthaccess.streaming import iter_records, stream_data
+
+
+@pytest.fixture
+def recorded(tmp_path, stub, credentials):
+    path = str(tmp_path / "cassette")
+    with Cassette(path, mode="record") as cassette:
+        client = Client(base_url=stub.url, credentials=credentials, cassette=cassette)
+        get_data("Holdings", "GET", client=client).raise_for_status()
+    return path
+
+
+def test_replayed_response_streams(recorded, credentials):
+    with Cassette(recorded) as cassette:
+        # Nothing listens here, so anything not replayed fails
+        client = Client(
+            base_url="http://127.0.0.1:9", credentials=credentials, cassette=cassette
+        )
+        response = get_data("Holdings", "GET", client=client)
+        chunks = list(response.iter_content(chunk_size=64))
+        assert b"".join(chunks) == response.content
+        records = list(iter_records(response))
+    assert len(records) == 10
+
+
+def test_streamed_requests_are_recorded_and_replayed(tmp_path, stub, credentials):
+    path = str(tmp_path / "cassette")
+    with Cassette(path, mode="auto") as cassette:
+        client = Client(base_url=stub.url, credentials=credentials, cassette=cassette)
+        records = list(stream_data("Holdings", "GET", client=client))
+        assert len(cassette) == 1
+    with Cassette(path) as cassette:
+        client = Client(
+            base_url="http://127.0.0.1:9", credentials=credentials, cassette=cassette
+        )
+        assert list(stream_data("Holdings", "GET", client=client)) == records
+        with pytest.raises(LookupError):
+            list(stream_data("Accounts", "GET", client=client))
+    assert stub.requests == {"Holdings": 1}
+
+
+def test_replay_never_sends_requests_with_headers(recorded, stub, credentials):
+    with Cassette(recorded) as cassette:
+        client = Client(base_url=stub.url, credentials=credentials, cassette=cassette)
+        with pytest.raises(LookupError):
+            client.send(
+                "Holdings",
+                "GET",
+                "/api/v2/advisor/holdings",
+                {},
+                "",
+                client.signer,
+                headers={"Range": "bytes=0-"},
+            )
+    assert stub.requests == {"Holdings": 1}
@@ -0,0 +1,207 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+import requests
+
+from wealthaccess.chunked import (
+    date_windows,
+    fetch_chunked,
+    get_investor_transactions_chunked,
+)
+from wealthaccess.client import set_client
+from wealthaccess.models import Transaction
+
+
+@pytest.fixture
+def shared(client):
+    previous = set_client(client)
+    yield client
+    set_client(previous)
+
+
+def test_outputs(shared):
+    kwargs = dict(startDate="2020-01-01", endDate="2020-03-31")
+    records = get_investor_transactions_chunked(1, **kwargs)
+    assert records == get_investor_transactions_chunked(1, output="records", **kwargs)
+    models = get_investor_transactions_chunked(1, output="models", **kwargs)
+    assert [type(m) for m in models] == [Transaction] * len(records)
+    assert [m.transaction_id for m in models] == [r["transactionId"] for r in records]
+
+
+def test_response_output_is_rejected(shared, stub):
+    with pytest.raises(ValueError):
+        get_investor_transactions_chunked(1, "2020-01-01", output="response")
+    assert stub.requests == {}
+
+
+def _day(text):
+    return date.fromisoformat(text)
+
+
+@pytest.mark.parametrize(
+    "start, end, chunk, windows",
+    [
+        (
+            "2020-01-15",
+            "2020-04-10",
+            "month",
+            [
+                ("2020-01-15", "2020-01-31"),
+                ("2020-02-01", "2020-02-29"),
+                ("2020-03-01", "2020-03-31"),
+                ("2020-04-01", "2020-04-10"),
+            ],
+        ),
+        (
+            "2020-02-10",
+            "2020-10-01",
+            "quarter",
+            [
+                ("2020-02-10", "2020-03-31"),
+                ("2020-04-01", "2020-06-30"),
+                ("2020-07-01", "2020-09-30"),
+                ("2020-10-01", "2020-10-01"),
+            ],
+        ),
+        (
+            "2019-11-30",
+            "2021-01-01",
+            "year",
+            [
+                ("2019-11-30", "2019-12-31"),
+                ("2020-01-01", "2020-12-31"),
+                ("2021-01-01", "2021-01-01"),
+            ],
+        ),
+        (
+            "2020-12-25",
+            "2021-01-10",
+            10,
+            [("2020-12-25", "2021-01-03"), ("2021-01-04", "2021-01-10")],
+        ),
+        (
+            "2020-01-01",
+            "2020-01-15",
+            timedelta(weeks=1),
+            [
+                ("2020-01-01", "2020-01-07"),
+                ("2020-01-08", "2020-01-14"),
+                ("2020-01-15", "2020-01-15"),
+            ],
+        ),
+        (
+            "2020-01-01",
+            "2020-01-02",
+            0,
+            [("2020-01-01", "2020-01-01"), ("2020-01-02", "2020-01-02")],
+        ),
+        ("2020-02-01", "2020-01-31", "month", []),
+    ],
+)
+def test_date_windows(start, end, chunk, windows):
+    expected = [(_day(a), _day(b)) for a, b in windows]
+    assert list(date_windows(start, end, chunk)) == expected
+    assert list(date_windows(_day(start), _day(end), chunk)) == expected
+
+
+class Endpoint:
+    """
+    Stands in for a transactions function: one transaction a day, numbered
+    from 2020-01-01, failing windows longer than max_days with error.
+    """
+
+    def __init__(self, per_day=1, max_days=None, error=None):
+        self.per_day = per_day
+        self.max_days = max_days
+        self.error = error
+        self.windows = []
+        self.lock = threading.Lock()
+
+    def __call__(self, investor_id, startDate, endDate, output=None, **kwargs):
+        start, end = _day(startDate), _day(endDate)
+        with self.lock:
+            self.windows.append((start, end))
+        if self.max_days is not None and (end - start).days + 1 > self.max_days:
+            raise self.error
+        records = []
+        day = start
+        while day <= end:
+            first = (day - date(2020, 1, 1)).days * self.per_day
+            records += [
+                {"transactionId": first + n, "transactionDate": day.isoformat()}
+                for n in range(self.per_day)
+            ]
+            day += timedelta(days=1)
+        return records
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "error", [requests.Timeout(), requests.ConnectionError(), _http_error(503)]
+)
+def test_failed_windows_are_split(error):
+    endpoint = Endpoint(max_days=8, error=error)
+    records = fetch_chunked(
+        endpoint, 1, startDate="2020-01-01", endDate="2020-01-31", chunk="month"
+    )
+    assert [r["transactionId"] for r in records] == list(range(31))
+    # Halved until every window is short enough to come back
+    assert endpoint.windows == [
+        (date(2020, 1, a), date(2020, 1, b))
+        for a, b in [(1, 31), (1, 16), (1, 8), (9, 16), (17, 31), (17, 24), (25, 31)]
+    ]
+
+
+def test_client_errors_are_not_split():
+    endpoint = Endpoint(max_days=8, error=_http_error(404))
+    with pytest.raises(requests.HTTPError):
+        fetch_chunked(endpoint, 1, startDate="2020-01-01", endDate="2020-01-31")
+    assert len(endpoint.windows) == 1
+
+
+def test_a_failing_single_day_is_raised():
+    endpoint = Endpoint(max_days=0, error=requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        fetch_chunked(endpoint, 1, startDate="2020-01-01", endDate="2020-01-04")
+
+
+def test_adaptive_windows_aim_for_target_records():
+    endpoint = Endpoint(per_day=10)
+    records = fetch_chunked(
+        endpoint,
+        1,
+        startDate="2020-01-01",
+        endDate="2020-03-31",
+        chunk="adaptive",
+        target_records=100,
+    )
+    assert len(records) == 91 * 10
+    probe, *windows = sorted(endpoint.windows)
+    assert probe == (date(2020, 1, 1), date(2020, 1, 31))
+    assert windows[0] == (date(2020, 2, 1), date(2020, 2, 10))
+    assert all((end - start).days <= 9 for start, end in windows)
+
+
+def test_duplicates_are_dropped_and_ids_sorted_as_numbers():
+    def overlapping(investor_id, startDate, endDate, output=None):
+        # Every window also returns the last day of the one before it
+        day = _day(startDate) - timedelta(days=1)
+        ids = {"2020-01-31": [10, 9], "2020-02-29": [100, 11]}
+        records = []
+        for key, values in ids.items():
+            if day.isoformat() <= key <= endDate:
+                records += [
+                    {"transactionId": i, "transactionDate": key} for i in values
+                ]
+        return records
+
+    records = fetch_chunked(
+        overlapping, 1, startDate="2020-01-01", endDate="2020-03-31"
+    )
+    assert [r["transactionId"] for r in records] == [9, 10, 11, 100]
@@ -0,0 +1,37 @@
+import pytest
+
+from wealthaccess.classes import Advisor
+from wealthaccess.private import get_data
+
+
+def test_advisor_signs_with_the_client_credentials(stub, client):
+    advisor = Advisor(client=client)
+    assert advisor.signer is client.signer
+    snapshot = advisor.get_investor_snapshot(1, parts=("profile", "holdings"))
+    assert snapshot.ok
+    assert stub.rejected == 0
+
+
+def test_explicit_credentials_win(client, credentials):
+    advisor = Advisor(client=client, credentials=credentials)
+    assert advisor.signer is not client.signer
+    assert advisor.signer.credentials is credentials
+
+
+def test_a_client_passed_in_stays_open(stub, client):
+    with Advisor(client=client) as advisor:
+        assert advisor.get_advisor_holdings().status_code == 200
+    assert get_data("Holdings", "GET", client=client).status_code == 200
+    assert stub.connections == 1
+
+
+def test_a_client_built_from_options_is_closed(stub, credentials):
+    with Advisor(base_url=stub.url, credentials=credentials) as advisor:
+        assert advisor.get_advisor_holdings().status_code == 200
+        client = advisor.client
+    assert client.closed
+
+
+def test_a_client_and_options_are_not_both_taken(client):
+    with pytest.raises(TypeError):
+        Advisor(client=client, pool_maxsize=4)
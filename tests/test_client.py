@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+
+
+def test_pooled_requests_share_a_connection(stub, client):
+    for _ in range(20):
+        assert get_data("Holdings", "GET", client=client).status_code == 200
+    assert stub.connections == 1
+
+
+def test_threaded_requests_stay_within_the_pool(stub, credentials):
+    with Client(base_url=stub.url, credentials=credentials, pool_maxsize=4) as client:
+
+        def one(_):
+            return get_data("Accounts", "GET", client=client).status_code
+
+        with ThreadPoolExecutor(4) as executor:
+            assert set(executor.map(one, range(40))) == {200}
+    assert stub.connections <= 4
+
+
+def test_without_keep_alive_every_request_connects(stub, credentials):
+    with Client(base_url=stub.url, credentials=credentials, keep_alive=False) as client:
+        for _ in range(5):
+            assert get_data("Holdings", "GET", client=client).status_code == 200
+    assert stub.connections == 5
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from wealthaccess.client import Client
+from wealthaccess.coalesce import AsyncSingleFlight, SingleFlight
+from wealthaccess.private import get_data
+
+
+def _together(n, func):
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        try:
+            return func()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(n) as executor:
+        return list(executor.map(call, range(n)))
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    threading.Timer(0.2, release.set).start()
+    results = _together(8, lambda: flight.do("key", slow))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+def test_single_flight_errors_reach_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = ValueError("failed")
+
+    def failing():
+        release.wait(5)
+        raise error
+
+    threading.Timer(0.2, release.set).start()
+    results = _together(8, lambda: flight.do("key", failing))
+    assert all(result is error for result in results)
+    assert len(flight) == 0
+    # Forgotten, so the next call runs again
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_concurrent_identical_gets_make_one_request(stub, credentials):
+    stub.delay = 0.3
+    with Client(base_url=stub.url, credentials=credentials, coalesce=True) as client:
+        results = _together(8, lambda: get_data("Holdings", "GET", client=client))
+        assert stub.requests["Holdings"] == 1
+        assert all(result is results[0] for result in results)
+        assert len(client.flights) == 0
+        get_data("Holdings", "GET", client=client)
+    assert stub.requests["Holdings"] == 2
+
+
+def test_concurrent_identical_get_errors_reach_every_caller(stub, credentials):
+    stub.delay = 0.3
+    stub.failures["Holdings"] = 1
+    with Client(base_url=stub.url, credentials=credentials, coalesce=True) as client:
+        results = _together(
+            8, lambda: get_data("Holdings", "GET", {}, {"output": "records"}, client)
+        )
+        assert all(isinstance(result, requests.HTTPError) for result in results)
+        assert len(client.flights) == 0
+    assert stub.requests["Holdings"] == 1
+
+
+def test_async_single_flight():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return object()
+
+        async def failing():
+            await asyncio.sleep(0.1)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(*(flight.do("key", slow) for _ in range(8)))
+        errors = await asyncio.gather(
+            *(flight.do("key", failing) for _ in range(8)), return_exceptions=True
+        )
+        return flight, calls, results, errors
+
+    flight, calls, results, errors = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert all(error is errors[0] for error in errors)
+    assert isinstance(errors[0], ValueError)
+    assert len(flight) == 0
+
+
+def test_async_concurrent_identical_gets_make_one_request(stub, credentials):
+    pytest.importorskip("aiohttp")
+    from wealthaccess import aio
+    stub.delay = 0.3
+
+    async def main():
+        async with aio.AsyncClient(
+            base_url=stub.url, credentials=credentials, coalesce=True
+        ) as client:
+            responses = await asyncio.gather(
+                *(aio.get_advisor_holdings(client=client) for _ in range(8))
+            )
+            stub.failures["Accounts"] = 1
+            errors = await asyncio.gather(
+                *(
+                    aio.get_advisor_accounts(client=client, output="records")
+                    for _ in range(8)
+                ),
+                return_exceptions=True,
+            )
+            return responses, errors, len(client.flights)
+
+    responses, errors, in_flight = asyncio.run(main())
+    assert all(response is responses[0] for response in responses)
+    assert all(error.status == 503 for error in errors)
+    assert in_flight == 0
+    assert stub.requests == {"Holdings": 1, "Accounts": 1}
@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+
+from wealthaccess.columnar import to_arrow, to_dataframe
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+RECORDS = [
+    {"transactionDate": "2020-01-02T10:11:12", "amount": "1.5", "isTransfer": True},
+    {"transactionDate": "2020-01-02T10:11:12.53", "amount": 2, "isTransfer": "false"},
+    {"transactionDate": "2020-01-03", "amount": "n/a", "isTransfer": None},
+    {"transactionDate": "not a date", "amount": None, "isTransfer": "false"},
+    {"transactionDate": None, "amount": 3.25, "isTransfer": False},
+]
+
+DATES = [
+    datetime.datetime(2020, 1, 2, 10, 11, 12),
+    datetime.datetime(2020, 1, 2, 10, 11, 12, 530000),
+    datetime.datetime(2020, 1, 3),
+    None,
+    None,
+]
+
+
+def test_dataframe_parses_mixed_iso_formats():
+    frame = to_dataframe(RECORDS, "Transactions")
+    dates = [None if pd.isna(v) else v.to_pydatetime() for v in frame.transactionDate]
+    assert dates == DATES
+    amounts = [None if pd.isna(v) else v for v in frame.amount]
+    assert amounts == [1.5, 2, None, None, 3.25]
+    assert str(frame.isTransfer.dtype) == "boolean"
+
+
+def test_arrow_parses_mixed_iso_formats():
+    table = to_arrow(RECORDS, "Transactions")
+    assert table.schema.field("transactionDate").type == pa.timestamp("us")
+    assert table.column("transactionDate").to_pylist() == DATES
+    assert table.schema.field("amount").type == pa.float64()
+    assert table.column("amount").to_pylist() == [1.5, 2, None, None, 3.25]
+    assert table.schema.field("isTransfer").type == pa.bool_()
+
+
+def test_outputs_agree():
+    frame = to_dataframe(RECORDS, "Transactions")
+    table = to_arrow(RECORDS, "Transactions").to_pandas()
+    for name in ("transactionDate", "amount", "isTransfer"):
+        assert frame[name].isna().tolist() == table[name].isna().tolist()
+    assert (frame.transactionDate.dropna() == table.transactionDate.dropna()).all()
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from wealthaccess.client import Client
+from wealthaccess.crawl import FirmCrawl, _process_settings
+from wealthaccess.throttle import RateLimiter, Retry
+
+from stub_server import StubServer
+
+
+@pytest.fixture
+def small_stub():
+    server = StubServer(("127.0.0.1", 0), records=3).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def small_client(small_stub, credentials):
+    with Client(base_url=small_stub.url, credentials=credentials) as client:
+        yield client
+
+
+def test_units_are_keyed_on_query_params(tmp_path, small_client):
+    crawl = FirmCrawl(str(tmp_path / "crawl.db"), "firm", client=small_client)
+    first = crawl.run(max_workers=2, startDate="2020-01-01")
+    second = crawl.run(max_workers=2, startDate="2021-01-01")
+    assert first["run"]["units"] == second["run"]["units"] == 1 + 3 + 9
+    start_dates = {params["startDate"] for params, _ in crawl.results()}
+    assert start_dates == {"2020-01-01", "2021-01-01"}
+    # Resuming a finished crawl does nothing
+    assert crawl.run(max_workers=2, startDate="2020-01-01")["run"]["units"] == 0
+
+
+def test_failed_units_wait_before_retrying(tmp_path, small_stub, small_client):
+    small_stub.failures["FirmInvestors"] = 1
+    crawl = FirmCrawl(
+        str(tmp_path / "crawl.db"), "firm", client=small_client, retry_delay=0.3
+    )
+    start = time.monotonic()
+    report = crawl.run(max_workers=2)
+    assert time.monotonic() - start >= 0.3
+    assert report["units"]["firm"]["done"] == 1
+    assert list(crawl.failures()) == []
+
+
+def test_process_settings_forward_the_client_configuration(credentials):
+    retry = Retry(total=5)
+    client = Client(
+        credentials=credentials,
+        timeout=7,
+        retry=retry,
+        rate_limiter=RateLimiter(8, per_endpoint={"Accounts": (4, 8)}),
+    )
+    settings = _process_settings(client, 4)
+    assert settings["credentials"] is credentials
+    assert settings["timeout"] == 7
+    assert settings["retry"] is retry
+    assert settings["rate_limits"] == ((2, 2), {"Accounts": (1, 2)})
@@ -0,0 +1,171 @@
+import io
+
+import pytest
+import requests
+
+from wealthaccess.client import Client
+from wealthaccess.documents import (
+    MultipartFile,
+    download_investor_document,
+    upload_investor_document,
+    walk_investor_documents,
+)
+from wealthaccess.throttle import Retry
+
+
+def test_walk_search_looks_inside_other_folders(client):
+    # The stub lists the same entries in every folder, with document-10.pdf
+    # the only folder
+    walk = walk_investor_documents(1, client=client, searchTerm="Document-3")
+    paths = sorted(path for path, _ in walk)
+    assert paths == ["/document-10.pdf/document-3.pdf", "/document-3.pdf"]
+
+
+def test_download_to_a_path(stub, client, tmp_path):
+    path = tmp_path / "statement.pdf"
+    assert download_investor_document(1, 2, str(path), client=client) == 100000
+    assert path.read_bytes() == stub.document
+    assert not (tmp_path / "statement.pdf.part").exists()
+    assert stub.ranges == [None]
+
+
+def test_download_to_a_file_object(stub, client):
+    f = io.BytesIO()
+    download_investor_document(1, 2, f, chunk_size=4096, client=client)
+    assert f.getvalue() == stub.document
+
+
+def test_download_resumes_a_part_file(stub, client, tmp_path):
+    path = tmp_path / "statement.pdf"
+    (tmp_path / "statement.pdf.part").write_bytes(stub.document[:1000])
+    download_investor_document(1, 2, str(path), client=client)
+    assert path.read_bytes() == stub.document
+    assert stub.ranges == ["bytes=1000-"]
+
+
+def test_download_of_a_complete_part_file(stub, client, tmp_path):
+    path = tmp_path / "statement.pdf"
+    (tmp_path / "statement.pdf.part").write_bytes(stub.document)
+    assert download_investor_document(1, 2, str(path), client=client) == 100000
+    assert path.read_bytes() == stub.document
+    assert stub.ranges == ["bytes=100000-"]
+
+
+def test_download_restarts_when_range_is_ignored(stub, client, tmp_path):
+    stub.honor_range = False
+    path = tmp_path / "statement.pdf"
+    (tmp_path / "statement.pdf.part").write_bytes(b"x" * 1000)
+    download_investor_document(1, 2, str(path), client=client)
+    assert path.read_bytes() == stub.document
+
+
+def test_download_resumes_a_dropped_connection(stub, client, tmp_path):
+    stub.drop_after = 30000
+    path = tmp_path / "statement.pdf"
+    download_investor_document(1, 2, str(path), chunk_size=1024, client=client)
+    assert path.read_bytes() == stub.document
+    # Resumed from the last whole chunk written
+    assert stub.ranges[0] is None
+    assert 0 < int(stub.ranges[1][6:-1]) <= 30000
+    assert len(stub.ranges) == 2
+
+
+def test_download_gives_up_after_max_resumes(stub, client, tmp_path):
+    stub.drop_after = 30000
+    path = tmp_path / "statement.pdf"
+    with pytest.raises(requests.RequestException):
+        download_investor_document(1, 2, str(path), max_resumes=0, client=client)
+    assert not path.exists()
+    assert (tmp_path / "statement.pdf.part").exists()
+
+
+def test_short_download_keeps_the_part_file(stub, client, tmp_path):
+    stub.cut_short = 500
+    path = tmp_path / "statement.pdf"
+    (tmp_path / "statement.pdf.part").write_bytes(stub.document[:1000])
+    with pytest.raises(IOError, match="99500 bytes of a 100000"):
+        download_investor_document(1, 2, str(path), client=client)
+    assert not path.exists()
+    part = tmp_path / "statement.pdf.part"
+    assert part.read_bytes() == stub.document[:99500]
+    # Running it again picks up where it stopped
+    download_investor_document(1, 2, str(path), client=client)
+    assert path.read_bytes() == stub.document
+    assert stub.ranges[-1] == "bytes=99500-"
+
+
+class Unseekable:
+    def __init__(self, data):
+        self.f = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self.f.read(size)
+
+
+def _parts(headers, body):
+    content_type = headers["Content-Type"]
+    assert content_type.startswith("multipart/form-data; boundary=")
+    boundary = content_type.split("boundary=")[1].encode()
+    head, _, rest = body.partition(b"\r\n\r\n")
+    assert head.startswith(b"--" + boundary + b"\r\n")
+    assert rest.endswith(b"\r\n--" + boundary + b"--\r\n")
+    return head, rest[: -len(boundary) - 8]
+
+
+def test_upload_a_path(stub, client, tmp_path):
+    path = tmp_path / "june.pdf"
+    path.write_bytes(stub.document)
+    response = upload_investor_document(1, str(path), client=client)
+    assert response.status_code == 200
+    [(headers, body)] = stub.uploads
+    assert int(headers["Content-Length"]) == len(body)
+    assert "Transfer-Encoding" not in headers
+    head, content = _parts(headers, body)
+    assert b'name="file"; filename="june.pdf"' in head
+    assert b"Content-Type: application/pdf" in head
+    assert content == stub.document
+
+
+def test_upload_a_seekable_file_from_its_position(stub, client):
+    f = io.BytesIO(b"skipped" + stub.document)
+    f.seek(7)
+    upload_investor_document(1, f, "june.pdf", chunk_size=4096, client=client)
+    [(headers, body)] = stub.uploads
+    assert int(headers["Content-Length"]) == len(body)
+    assert _parts(headers, body)[1] == stub.document
+
+
+def test_upload_an_unseekable_file_is_chunked(stub, client):
+    source = Unseekable(stub.document)
+    upload_investor_document(1, source, "june.pdf", chunk_size=4096, client=client)
+    [(headers, body)] = stub.uploads
+    assert headers["Transfer-Encoding"] == "chunked"
+    assert "Content-Length" not in headers
+    assert _parts(headers, body)[1] == stub.document
+
+
+def test_upload_is_sent_again_on_retry(stub, credentials, tmp_path):
+    stub.failures["AdvisorInvestorDocumentPost"] = 1
+    path = tmp_path / "june.pdf"
+    path.write_bytes(stub.document)
+    retry = Retry(backoff_factor=0, methods=("POST",))
+    with Client(base_url=stub.url, credentials=credentials, retry=retry) as client:
+        response = upload_investor_document(1, str(path), client=client)
+    assert response.status_code == 200
+    assert len(stub.uploads) == 2
+    assert [_parts(*upload)[1] for upload in stub.uploads] == [stub.document] * 2
+
+
+def test_multipart_file_framing():
+    body = MultipartFile(io.BytesIO(b"data"), 'a "quoted" name.txt', field="doc")
+    data = b"".join(body)
+    assert data == b"".join(body)
+    assert body.len == len(data)
+    assert data == (
+        f"--{body.boundary}\r\n"
+        'Content-Disposition: form-data; name="doc"; '
+        'filename="a %22quoted%22 name.txt"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+        f"data\r\n--{body.boundary}--\r\n"
+    ).encode()
+    assert body.content_type == f"multipart/form-data; boundary={body.boundary}"
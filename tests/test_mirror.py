@@ -0,0 +1,24 @@
+import threading
+
+from wealthaccess.mirror import BookMirror
+
+
+def test_concurrent_refresh_if_stale_refreshes_once(stub, client, tmp_path):
+    path = str(tmp_path / "book.db")
+    BookMirror(path, client=client)
+    barrier = threading.Barrier(4)
+    results = []
+
+    def refresh():
+        mirror = BookMirror(path, client=client)
+        barrier.wait()
+        results.append(mirror.refresh_if_stale(60))
+
+    threads = [threading.Thread(target=refresh) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stub.requests["Investors"] == 1
+    assert sum(result is not None for result in results) == 1
+    assert BookMirror(path, client=client).refresh_if_stale(60) is None
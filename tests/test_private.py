@@ -0,0 +1,17 @@
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+
+from conftest import KEYS
+
+
+def test_keys_as_kwargs_without_environment(stub, clean_env):
+    client = Client(base_url=stub.url)
+    response = get_data("Accounts", "GET", query_params=dict(KEYS), client=client)
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert client._signer is None
+
+
+def test_client_credentials(client, clean_env):
+    response = get_data("Holdings", "GET", client=client)
+    assert response.status_code == 200
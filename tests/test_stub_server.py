@@ -0,0 +1,26 @@
+from wealthaccess.auth import Credentials
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+
+from conftest import API_KEY, USER_GUID
+
+
+def test_signature_covers_sorted_query_params(stub, client):
+    response = get_data(
+        "AdvisorInvestorTransactions",
+        "GET",
+        uri_params={"investor_id": 1},
+        query_params={"startDate": "2020-01-01", "endDate": "2020-06-30"},
+        client=client,
+    )
+    assert response.status_code == 200
+    assert stub.rejected == 0
+
+
+def test_wrong_secret_is_rejected(stub):
+    credentials = Credentials(API_KEY, "wrong", USER_GUID)
+    with Client(base_url=stub.url, credentials=credentials) as client:
+        response = get_data("Holdings", "GET", client=client)
+    assert response.status_code == 401
+    assert response.json()["message"] == "Invalid signature"
+    assert stub.rejected == 1
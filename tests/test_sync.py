@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import stub_server
+from wealthaccess.sync import TransactionSync
+
+
+@pytest.fixture
+def sync(client, tmp_path):
+    return TransactionSync(str(tmp_path / "sync.db"), client=client)
+
+
+def _ids(transactions):
+    return [t["transactionId"] for t in transactions]
+
+
+def test_first_sync_stores_everything(sync):
+    assert sync.watermark is None
+    assert _ids(sync.sync(startDate="2010-01-01")) == list(range(1, 11))
+    assert sync.watermark == 10
+    assert _ids(sync.transactions()) == list(range(1, 11))
+
+
+def test_later_syncs_only_fetch_newer_transactions(sync, stub):
+    sync.sync()
+    assert sync.sync() == []
+    stub.sizes["Transactions"] = 15
+    assert _ids(sync.sync()) == [11, 12, 13, 14, 15]
+    assert sync.watermark == 15
+    assert _ids(sync.transactions()) == list(range(1, 16))
+
+
+def test_refetched_transactions_are_updated(sync, monkeypatch):
+    sync.sync()
+    with sqlite3.connect(sync.path) as conn:
+        conn.execute("UPDATE checkpoints SET watermark = 5")
+    make_record = stub_server.make_record
+
+    def changed(key, i):
+        return dict(make_record(key, i), description="changed")
+
+    monkeypatch.setattr(stub_server, "make_record", changed)
+    assert _ids(sync.sync()) == [6, 7, 8, 9, 10]
+    descriptions = [t["description"] for t in sync.transactions()]
+    assert descriptions == [f"Transaction {i}" for i in range(1, 6)] + ["changed"] * 5
+    assert sync.watermark == 10
+
+
+def test_watermark_never_moves_back(sync, client):
+    sync.sync()
+    with sqlite3.connect(sync.path) as conn:
+        conn.execute("UPDATE checkpoints SET watermark = 20")
+
+    class Behind(TransactionSync):
+        # Read its watermark before another process moved it on
+        watermark = 5
+
+    assert _ids(Behind(sync.path, client=client).sync()) == [6, 7, 8, 9, 10]
+    assert sync.watermark == 20
+
+
+def test_reset(sync):
+    sync.sync()
+    sync.reset()
+    assert sync.watermark is None
+    assert list(sync.transactions()) == []
+    assert len(sync.sync()) == 10
+
+
+def test_names_are_kept_apart(sync, client):
+    sync.sync()
+    other = TransactionSync(sync.path, name="other", client=client)
+    assert other.watermark is None
+    other.sync()
+    sync.reset()
+    assert other.watermark == 10
+
+
+def test_output_is_rejected(sync):
+    with pytest.raises(TypeError):
+        sync.sync(output="dataframe")
@@ -0,0 +1,146 @@
+from email.utils import formatdate
+
+import pytest
+
+from wealthaccess import throttle
+from wealthaccess.client import Client
+from wealthaccess.private import get_data
+from wealthaccess.throttle import RateLimiter, Retry, TokenBucket
+
+from conftest import Clock
+
+
+class Response:
+    def __init__(self, status_code=503, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle, "time", clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_the_rate(clock):
+    bucket = TokenBucket(2, burst=3)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.slept == [0.5]
+    bucket.acquire()
+    assert clock.slept == [0.5, 0.5]
+
+
+def test_bucket_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(10, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == [pytest.approx(0.1)]
+
+
+def test_pause_holds_callers_back_after_an_idle_spell(clock):
+    bucket = TokenBucket(10)
+    bucket.acquire()
+    # A request in flight for longer than the pause
+    clock.now += 6
+    bucket.pause(5)
+    bucket.acquire()
+    assert sum(clock.slept) >= 5
+
+
+def test_pause_never_shortens_a_longer_wait(clock):
+    bucket = TokenBucket(1, burst=1)
+    bucket.pause(10)
+    bucket.pause(1)
+    bucket.acquire()
+    assert sum(clock.slept) >= 10
+
+
+def test_limiter_takes_the_global_and_endpoint_budgets(clock):
+    limiter = RateLimiter(rate=100, per_endpoint={"Holdings": (1, 1)})
+    limiter.acquire("Holdings")
+    limiter.acquire("Accounts")
+    assert clock.slept == []
+    limiter.acquire("Holdings")
+    assert clock.slept == [1]
+
+
+def test_limiter_pause_only_holds_shared_budgets(clock):
+    limiter = RateLimiter(per_endpoint={"Holdings": 10, "Accounts": 10})
+    limiter.pause("Holdings", 5)
+    limiter.acquire("Accounts")
+    assert clock.slept == []
+    limiter.acquire("Holdings")
+    assert sum(clock.slept) >= 5
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(throttle.random, "uniform", lambda low, high: high)
+    retry = Retry(backoff_factor=0.5, max_backoff=3)
+    assert [retry.backoff(n) for n in range(4)] == [0.5, 1, 2, 3]
+
+
+def test_backoff_honors_retry_after_seconds():
+    retry = Retry(max_backoff=60)
+    assert retry.backoff(0, Response(headers={"Retry-After": "42"})) == 42
+
+
+def test_backoff_honors_retry_after_dates(clock):
+    retry = Retry(max_backoff=60)
+    date = formatdate(clock.now + 30, usegmt=True)
+    response = Response(headers={"Retry-After": date})
+    assert retry.backoff(0, response) == pytest.approx(30)
+
+
+def test_backoff_gives_up_on_a_longer_retry_after():
+    retry = Retry(max_backoff=60)
+    assert retry.backoff(0, Response(headers={"Retry-After": "120"})) is None
+
+
+def test_retryable():
+    retry = Retry(total=2)
+    assert retry.is_retryable("GET", 0)
+    assert retry.is_retryable("GET", 1, Response(429))
+    assert not retry.is_retryable("GET", 1, Response(404))
+    assert not retry.is_retryable("GET", 2, Response(503))
+    assert not retry.is_retryable("POST", 0, Response(503))
+
+
+def test_retries_until_the_request_succeeds(stub, credentials):
+    stub.failures["Holdings"] = 2
+    retry = Retry(backoff_factor=0)
+    with Client(base_url=stub.url, credentials=credentials, retry=retry) as client:
+        response = get_data("Holdings", "GET", client=client)
+    assert response.status_code == 200
+    assert stub.requests["Holdings"] == 3
+
+
+def test_gives_up_after_total_retries(stub, credentials):
+    stub.failures["Holdings"] = 5
+    retry = Retry(total=1, backoff_factor=0)
+    with Client(base_url=stub.url, credentials=credentials, retry=retry) as client:
+        response = get_data("Holdings", "GET", client=client)
+    assert response.status_code == 503
+    assert stub.requests["Holdings"] == 2
+
+
+def test_gives_up_when_asked_to_wait_too_long(stub, credentials):
+    stub.failures["Holdings"] = 1
+    stub.failure_status = 429
+    stub.retry_after = 120
+    limiter = RateLimiter(rate=10)
+    with Client(
+        base_url=stub.url,
+        credentials=credentials,
+        rate_limiter=limiter,
+        retry=Retry(max_backoff=60),
+    ) as client:
+        response = get_data("Holdings", "GET", client=client)
+    assert response.status_code == 429
+    assert stub.requests["Holdings"] == 1
+    # The budget is held back for the whole Retry-After, not max_backoff
+    assert limiter.bucket.tokens <= -120 * 10
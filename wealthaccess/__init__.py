@@ -1,5 +1,109 @@
-from .advisor import *  # noqa
-from .classes import *  # noqa
-from .investor import *  # noqa
-from .firm import *  # noqa
-from .private import get_data  # noqa
+"""
+Python wrapper for the Wealth Access API.
+
+Everything is imported lazily: `import wealthaccess` only sets up this
+module, and the submodule behind a name (along with requests and anything
+else it needs) is imported the first time that name is used.
+"""
+import importlib
+
+
+_EXPORTS = {
+    "advisor": (
+        "get_advisor_accounts",
+        "get_advisor_holdings",
+        "get_advisor_transactions",
+        "get_classifications",
+        "get_diversifications",
+        "get_investors",
+    ),
+    "auth": ("Credentials", "Signer"),
+    "book": ("BookIndex",),
+    "bulk": (
+        "fan_out",
+        "get_all_investor_bank_transactions",
+        "get_all_investor_brokerage_transactions",
+        "get_all_investor_diversification_holdings",
+        "get_all_investor_holdings",
+        "get_all_investor_profiles",
+        "get_all_investor_transactions",
+        "map_unordered",
+    ),
+    "cache": ("BaseCache", "MemoryCache", "SQLiteCache"),
+    "cassette": ("Cassette",),
+    "chunked": (
+        "date_windows",
+        "fetch_chunked",
+        "get_investor_account_transactions_chunked",
+        "get_investor_bank_transactions_chunked",
+        "get_investor_brokerage_transactions_chunked",
+        "get_investor_transactions_chunked",
+    ),
+    "classes": ("Advisor", "Firm", "Investor"),
+    "client": ("Client", "get_client", "set_client"),
+    "coalesce": ("AsyncSingleFlight", "SingleFlight"),
+    "crawl": ("FirmCrawl", "crawl_firm"),
+    "documents": (
+        "MultipartFile",
+        "download_investor_document",
+        "download_investor_documents",
+        "upload_investor_document",
+        "upload_investor_documents",
+        "walk_all_investor_documents",
+        "walk_investor_documents",
+    ),
+    "firm": ("get_firm_clients",),
+    "investor": (
+        "get_investor_account_transactions",
+        "get_investor_accounts",
+        "get_investor_bank_transactions",
+        "get_investor_brokerage_transactions",
+        "get_investor_diversification_holdings",
+        "get_investor_document_detail",
+        "get_investor_documents",
+        "get_investor_holdings",
+        "get_investor_profile_adv",
+        "get_investor_profile_inv",
+        "get_investor_transactions",
+        "post_investor_document",
+    ),
+    "metrics": ("Histogram", "Metrics"),
+    "mirror": ("BookMirror", "mirror_book"),
+    "models": (
+        "Account",
+        "Document",
+        "Holding",
+        "InvestorProfile",
+        "ModelArray",
+        "Transaction",
+    ),
+    "private": ("get_data",),
+    "snapshot": ("InvestorSnapshot", "get_investor_snapshot"),
+    "streaming": (
+        "iter_advisor_accounts",
+        "iter_advisor_holdings",
+        "iter_advisor_transactions",
+        "iter_json_array",
+        "iter_records",
+        "stream_data",
+    ),
+    "sync": ("TransactionSync", "sync_advisor_transactions"),
+    "throttle": ("RateLimiter", "Retry", "TokenBucket"),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -78,7 +78,7 @@ def get_classifications(**kwargs):
         USER_GUID from Wealth Access.  Only necessary when not given as an
         environment variable.
     """
-    return get_data('Classifications', 'GET')
+    return get_data('Classifications', 'GET', query_params=kwargs)
 
 
 def get_diversifications(**kwargs):
@@ -97,7 +97,7 @@ def get_diversifications(**kwargs):
         USER_GUID from Wealth Access.  Only necessary when not given as an
         environment variable.
     """
-    return get_data('Diversifications', 'GET')
+    return get_data('Diversifications', 'GET', query_params=kwargs)
 
 
 def get_investors(**kwargs):
@@ -116,4 +116,4 @@ def get_investors(**kwargs):
         USER_GUID from Wealth Access.  Only necessary when not given as an
         environment variable.
     """
-    return get_data('Investors', 'GET')
+    return get_data('Investors', 'GET', query_params=kwargs)
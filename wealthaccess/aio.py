@@ -0,0 +1,611 @@
+"""
+Awaitable versions of the wealthaccess functions and classes.
+
+Requests are signed exactly like the blocking API (same endpoint registry,
+same HMAC signature) but are sent over a shared aiohttp session, with a semaphore
+bounding how many are in flight at once::
+
+    import asyncio
+    from wealthaccess import aio
+
+    async def main(investor_ids):
+        async with aio.AsyncClient(max_concurrency=200) as client:
+            adv = aio.AsyncAdvisor(client=client)
+            return await asyncio.gather(
+                *[adv.get_investor_holdings(i) for i in investor_ids]
+            )
+"""
+import asyncio
+import json
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .auth import Credentials, Signer
+from .client import BASE_URL, _request_key
+from .coalesce import AsyncSingleFlight
+from .columnar import convert
+from .endpoints import ENDPOINTS
+from .private import _get_signer
+from .snapshot import DEFAULT_PARTS, PARTS, InvestorSnapshot, _check_parts
+
+
+class Response:
+    """
+    Fully read response returned by every awaitable call.  It mirrors the
+    parts of `requests.Response` the blocking API is normally used for.
+    """
+
+    def __init__(self, status_code, headers, content, url, request_info=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.request_info = request_info
+
+    def __repr__(self):
+        return f"<Response [{self.status_code}]>"
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+    def raise_for_status(self):
+        if not self.ok:
+            # The error's str() needs the request it was raised for
+            raise aiohttp.ClientResponseError(
+                self.request_info,
+                (),
+                status=self.status_code,
+                message=self.text,
+                headers=self.headers,
+            )
+
+
+class AsyncClient:
+    """
+    Owns the aiohttp session and the semaphore bounding in-flight requests.
+
+    Keyword Arguments
+    -----------------
+    max_concurrency: int, default 100, optional
+        Maximum number of requests in flight at once
+    limit: int, default 100, optional
+        Maximum number of open connections
+    limit_per_host: int, default 0, optional
+        Maximum number of open connections to a single host, 0 for no limit
+    timeout: float, default None, optional
+        Total timeout, in seconds, for each request
+    base_url: str, default https://api.wealthaccess.com, optional
+        Root URL the endpoint URIs are appended to
+    credentials: Credentials, default None, optional
+        Keys used to sign requests.  They're read from the environment on
+        the first request when not given.
+    coalesce: bool, default False, optional
+        Let concurrent tasks making an identical GET request share one
+        round-trip and one response
+    """
+
+    def __init__(
+        self,
+        max_concurrency=100,
+        limit=100,
+        limit_per_host=0,
+        timeout=None,
+        base_url=BASE_URL,
+        credentials=None,
+        coalesce=False,
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "The async client requires aiohttp: pip install wealthaccess[async]"
+            )
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.credentials = credentials
+        self.coalesce = coalesce
+        self.flights = None
+        self.closed = False
+        self._signer = None
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def signer(self):
+        if self._signer is None:
+            self._signer = Signer(self.credentials or Credentials())
+        return self._signer
+
+    async def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop:
+            previous = self._session
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.flights = AsyncSingleFlight() if self.coalesce else None
+            self._loop = loop
+            if previous is not None:
+                # A session can't be used from another loop, but closing it
+                # releases its connector instead of leaking it
+                try:
+                    await previous.close()
+                except Exception:
+                    pass
+        return self._session
+
+    async def request(
+        self, requested_uri, sorted_params, query_params, method, signer
+    ):
+        if self.closed:
+            raise RuntimeError("Cannot make a request with a closed AsyncClient")
+        session = await self._get_session()
+        request = (session, requested_uri, sorted_params, query_params, method, signer)
+        if self.flights is not None and method == "GET":
+            return await self.flights.do(
+                _request_key(signer, method, requested_uri, sorted_params),
+                lambda: self._send(*request),
+            )
+        return await self._send(*request)
+
+    async def _send(
+        self, session, requested_uri, sorted_params, query_params, method, signer
+    ):
+        async with self._semaphore:
+            # Sign once a slot is free so queued requests don't go out with a
+            # stale x-WATimestamp
+            headers = signer.headers(requested_uri, sorted_params, method)
+            async with session.request(
+                method,
+                f"{self.base_url}{requested_uri}",
+                params=query_params,
+                headers=headers,
+            ) as response:
+                content = await response.read()
+                return Response(
+                    response.status,
+                    response.headers,
+                    content,
+                    str(response.url),
+                    response.request_info,
+                )
+
+    async def close(self):
+        """
+        Close the underlying session.  The client can't be used afterwards.
+        """
+        if self._session is not None:
+            await self._session.close()
+        self.closed = True
+
+
+_default_client = None
+
+
+def get_async_client():
+    """
+    Returns the async client shared by the module-level functions, creating
+    one with the default settings on first use.
+    """
+    global _default_client
+    if _default_client is None or _default_client.closed:
+        _default_client = AsyncClient()
+    return _default_client
+
+
+def set_async_client(client):
+    """
+    Replace the async client shared by the module-level functions.  The
+    previous client is returned without being closed.
+    """
+    global _default_client
+    previous, _default_client = _default_client, client
+    return previous
+
+
+async def get_data(key, method, uri_params={}, query_params={}, client=None):
+    client = client or get_async_client()
+    endpoint = ENDPOINTS[key]
+    output = query_params.get("output")
+    signer, query_params = _get_signer(query_params, client)
+    requested_uri = endpoint.requested_uri(uri_params)
+    query_params, sorted_params = endpoint.query(query_params)
+    response = await client.request(
+        requested_uri, sorted_params, query_params, method, signer
+    )
+    return convert(response, key, output)
+
+
+# ADVISOR
+async def get_advisor_accounts(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_advisor_accounts`.
+    """
+    return await get_data("Accounts", "GET", query_params=kwargs, client=client)
+
+
+async def get_advisor_holdings(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_advisor_holdings`.
+    """
+    return await get_data("Holdings", "GET", query_params=kwargs, client=client)
+
+
+async def get_advisor_transactions(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_advisor_transactions`.
+    """
+    return await get_data("Transactions", "GET", query_params=kwargs, client=client)
+
+
+async def get_classifications(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_classifications`.
+    """
+    return await get_data(
+        "Classifications", "GET", query_params=kwargs, client=client
+    )
+
+
+async def get_diversifications(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_diversifications`.
+    """
+    return await get_data(
+        "Diversifications", "GET", query_params=kwargs, client=client
+    )
+
+
+async def get_investors(client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investors`.
+    """
+    return await get_data("Investors", "GET", query_params=kwargs, client=client)
+
+
+# INVESTOR
+async def get_investor_account_transactions(
+    client_identifier, account_number, client=None, **kwargs
+):
+    """
+    Awaitable version of `wealthaccess.get_investor_account_transactions`.
+    """
+    return await get_data(
+        "InvestorAccountTransactions",
+        "GET",
+        query_params=dict(
+            kwargs, clientIdentifier=client_identifier, accountNumber=account_number
+        ),
+        client=client,
+    )
+
+
+async def get_investor_accounts(client_identifier, client=None):
+    """
+    Awaitable version of `wealthaccess.get_investor_accounts`.
+    """
+    return await get_data(
+        "InvestorAccounts",
+        "GET",
+        query_params={"clientIdentifier": client_identifier},
+        client=client,
+    )
+
+
+async def get_investor_bank_transactions(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_bank_transactions`.
+    """
+    return await get_data(
+        key="AdvisorInvestorBankTransactions",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_brokerage_transactions(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_brokerage_transactions`.
+    """
+    return await get_data(
+        key="AdvisorInvestorBrokerageTransactions",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_diversification_holdings(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_diversification_holdings`.
+    """
+    return await get_data(
+        key="AdvisorInvestorDiversificationHoldings",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_document_detail(
+    investor_id, vault_file_id, client=None, **kwargs
+):
+    """
+    Awaitable version of `wealthaccess.get_investor_document_detail`.
+    """
+    return await get_data(
+        key="AdvisorInvestorDocumentsDetail",
+        method="GET",
+        uri_params={"investor_id": investor_id, "vault_file_id": vault_file_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_documents(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_documents`.
+    """
+    return await get_data(
+        key="AdvisorInvestorDocumentsList",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_holdings(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_holdings`.
+    """
+    return await get_data(
+        key="AdvisorInvestorHoldings",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def get_investor_profile_inv(client_identifier, client=None):
+    """
+    Awaitable version of `wealthaccess.get_investor_profile_inv`.
+    """
+    return await get_data(
+        "InvestorProfile",
+        "GET",
+        query_params={"clientIdentifier": client_identifier},
+        client=client,
+    )
+
+
+async def get_investor_profile_adv(investor_id, client=None):
+    """
+    Awaitable version of `wealthaccess.get_investor_profile_adv`.
+    """
+    return await get_data(
+        "AdvisorInvestorProfile",
+        "GET",
+        uri_params={"investor_id": investor_id},
+        client=client,
+    )
+
+
+async def get_investor_snapshot(
+    investor_id, parts=DEFAULT_PARTS, client=None, **kwargs
+):
+    """
+    Awaitable version of `wealthaccess.get_investor_snapshot`.
+    """
+    parts = _check_parts(parts)
+
+    query_params = dict(kwargs, output="records")
+
+    async def fetch(part):
+        return await get_data(
+            PARTS[part],
+            "GET",
+            uri_params={"investor_id": investor_id},
+            query_params=query_params,
+            client=client,
+        )
+
+    results = await asyncio.gather(
+        *(fetch(part) for part in parts), return_exceptions=True
+    )
+    data, errors = {}, {}
+    for part, result in zip(parts, results):
+        if isinstance(result, Exception):
+            data[part] = None
+            errors[part] = result
+        else:
+            data[part] = result
+    return InvestorSnapshot(investor_id, data, errors)
+
+
+async def get_investor_transactions(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.get_investor_transactions`.
+    """
+    return await get_data(
+        key="AdvisorInvestorTransactions",
+        method="GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+        client=client,
+    )
+
+
+async def post_investor_document(investor_id, client=None, **kwargs):
+    """
+    Awaitable version of `wealthaccess.post_investor_document`.
+    """
+    return await get_data(
+        key="AdvisorInvestorDocumentPost",
+        method="POST",
+        uri_params={"investor_id": investor_id},
+        query_params=dict(kwargs, investorId=investor_id),
+        client=client,
+    )
+
+
+# FIRM
+async def get_firm_clients(firm, client=None):
+    """
+    Awaitable version of `wealthaccess.get_firm_clients`.
+    """
+    return await get_data(
+        "FirmInvestors", "GET", query_params={"firm": firm}, client=client
+    )
+
+
+class _AsyncWealthAccessBase:
+    def __init__(self, client=None, **client_options):
+        if client is not None and client_options:
+            raise TypeError("Pass either a client or options for a new one")
+        self._owns_client = bool(client_options)
+        self._client = AsyncClient(**client_options) if client_options else client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def client(self):
+        return self._client or get_async_client()
+
+    async def close(self):
+        """
+        Close the client this instance built from its options.  A client
+        passed in, and the shared default client, are left open for whoever
+        else uses them.
+        """
+        if self._owns_client:
+            await self._client.close()
+
+
+class AsyncAdvisor(_AsyncWealthAccessBase):
+    """
+    Awaitable version of `wealthaccess.Advisor`.
+    """
+
+    # INVESTORS
+    async def get_investor_bank_transactions(self, investor_id, **kwargs):
+        return await get_investor_bank_transactions(
+            investor_id, client=self.client, **kwargs
+        )
+
+    async def get_investor_brokerage_transactions(self, investor_id, **kwargs):
+        return await get_investor_brokerage_transactions(
+            investor_id, client=self.client, **kwargs
+        )
+
+    async def get_investor_diversification_holdings(self, investor_id, **kwargs):
+        return await get_investor_diversification_holdings(
+            investor_id, client=self.client, **kwargs
+        )
+
+    async def get_investor_document_detail(self, investor_id, vault_file_id, **kwargs):
+        return await get_investor_document_detail(
+            investor_id, vault_file_id, client=self.client, **kwargs
+        )
+
+    async def get_investor_documents(self, investor_id, **kwargs):
+        return await get_investor_documents(investor_id, client=self.client, **kwargs)
+
+    async def get_investor_holdings(self, investor_id, **kwargs):
+        return await get_investor_holdings(investor_id, client=self.client, **kwargs)
+
+    async def get_investor_profile(self, investor_id):
+        return await get_investor_profile_adv(investor_id, client=self.client)
+
+    async def get_investor_snapshot(self, investor_id, parts=DEFAULT_PARTS, **kwargs):
+        return await get_investor_snapshot(
+            investor_id, parts, client=self.client, **kwargs
+        )
+
+    async def get_investor_transactions(self, investor_id, **kwargs):
+        return await get_investor_transactions(
+            investor_id, client=self.client, **kwargs
+        )
+
+    async def post_investor_document(self, investor_id, **kwargs):
+        return await post_investor_document(investor_id, client=self.client, **kwargs)
+
+    # ADVISOR
+    async def get_accounts(self, **kwargs):
+        return await get_advisor_accounts(client=self.client, **kwargs)
+
+    async def get_advisor_holdings(self, **kwargs):
+        return await get_advisor_holdings(client=self.client, **kwargs)
+
+    async def get_advisor_transactions(self, **kwargs):
+        return await get_advisor_transactions(client=self.client, **kwargs)
+
+    async def get_classifications(self):
+        return await get_classifications(client=self.client)
+
+    async def get_diversifications(self):
+        return await get_diversifications(client=self.client)
+
+    async def get_investors(self):
+        return await get_investors(client=self.client)
+
+
+class AsyncInvestor(_AsyncWealthAccessBase):
+    """
+    Awaitable version of `wealthaccess.Investor`.
+    """
+
+    async def get_account_transactions(
+        self, client_identifier, account_number, **kwargs
+    ):
+        return await get_investor_account_transactions(
+            client_identifier, account_number, client=self.client, **kwargs
+        )
+
+    async def get_accounts(self, client_identifier):
+        return await get_investor_accounts(client_identifier, client=self.client)
+
+    async def get_profile(self, client_identifier):
+        return await get_investor_profile_inv(client_identifier, client=self.client)
+
+
+class AsyncFirm(_AsyncWealthAccessBase):
+    """
+    Awaitable version of `wealthaccess.Firm`.
+    """
+
+    async def get_clients(self, firm):
+        return await get_firm_clients(firm, client=self.client)
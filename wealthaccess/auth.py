@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+from email.utils import formatdate
+
+
+class Credentials:
+    """
+    Keys provided by Wealth Access.  Any key not given is read from its
+    environment variable once, when the credentials are created.
+
+    Keyword Arguments
+    -----------------
+    api_key: str, default WA_API_KEY environment variable, optional
+    secret_key: str, default WA_SECRET_KEY environment variable, optional
+    user_guid: str, default WA_USER_GUID environment variable, optional
+    """
+
+    def __init__(self, api_key=None, secret_key=None, user_guid=None):
+        self.api_key = api_key or os.getenv("WA_API_KEY")
+        self.secret_key = secret_key or os.getenv("WA_SECRET_KEY")
+        self.user_guid = user_guid or os.getenv("WA_USER_GUID")
+        if None in (self.api_key, self.secret_key, self.user_guid):
+            raise TypeError(
+                "You're missing a key required by Wealth Access to make requests"
+            )
+
+    def __repr__(self):
+        return f"Credentials(api_key={self.api_key!r}, user_guid={self.user_guid!r})"
+
+
+class Signer:
+    """
+    Creates the WAS authentication headers for a set of credentials.
+
+    The HMAC is keyed once and copied for every signature, and the
+    x-WATimestamp value is only re-formatted when the second changes.
+
+    Arguments
+    ---------
+    credentials: Credentials, required
+    """
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._hmac = hmac.new(
+            credentials.secret_key.encode("utf-8"), digestmod=hashlib.sha256
+        )
+        self._prefix = f"{credentials.api_key}\n"
+        self._authorization = f"WAS {credentials.user_guid}:"
+        self._timestamp = (None, None)
+
+    def timestamp(self):
+        now = int(time.time())
+        second, formatted = self._timestamp
+        if second != now:
+            formatted = formatdate(now, usegmt=True)
+            self._timestamp = (now, formatted)
+        return formatted
+
+    def signature(self, gmt_time, requested_uri, sorted_parameters, method):
+        string = f"{self._prefix}{method}\n{gmt_time}\n{requested_uri}\n"
+        if sorted_parameters:
+            string += sorted_parameters
+        mac = self._hmac.copy()
+        mac.update(string.encode("utf-8"))
+        return base64.b64encode(mac.digest()).decode("utf-8")
+
+    def headers(self, requested_uri, sorted_parameters, method):
+        gmt_time = self.timestamp()
+        signature = self.signature(gmt_time, requested_uri, sorted_parameters, method)
+        return {
+            "Authorization": f"{self._authorization}{signature}",
+            "x-WAApiKey": self.credentials.api_key,
+            "x-WATimestamp": gmt_time,
+        }
@@ -0,0 +1,339 @@
+"""
+In-memory index over an advisor's holdings and accounts, for answering
+"all holdings of a symbol", "accounts for an investor" or "market value by
+classification" without scanning the payloads.
+"""
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ThreadPoolExecutor
+
+from .private import get_data
+
+
+def _number(value):
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+class _Table:
+    """
+    Records of one kind, with a hash index on each of `fields`, a sorted
+    index on each of `numerics` and running totals of the numerics for
+    every value of every indexed field.
+    """
+
+    def __init__(self, key_fields, fields, numerics, resolve=None):
+        self.key_fields = key_fields
+        self.fields = fields
+        self.numerics = numerics
+        self.resolve = resolve
+        self.records = {}
+        self._entries = {}
+        self._ids = {}
+        self._next_id = 0
+        self._hash = {field: {} for field in fields}
+        self._sorted = {field: [] for field in numerics}
+        self._totals = {field: {} for field in fields}
+
+    def key(self, record):
+        if len(self.key_fields) == 1:
+            return record.get(self.key_fields[0])
+        return tuple(record.get(field) for field in self.key_fields)
+
+    def _entry(self, record):
+        get = self.resolve or (lambda record, field: record.get(field))
+        return (
+            tuple(get(record, field) for field in self.fields),
+            tuple(_number(record.get(field)) for field in self.numerics),
+        )
+
+    def _add(self, key, record, entry, bulk=False):
+        values, numbers = entry
+        self.records[key] = record
+        self._entries[key] = entry
+        id_ = self._ids[key] = self._next_id
+        self._next_id += 1
+        for field, value in zip(self.fields, values):
+            self._hash[field].setdefault(value, set()).add(key)
+            totals = self._totals[field].setdefault(value, [0.0] * len(numbers))
+            for i, number in enumerate(numbers):
+                totals[i] += number or 0.0
+        for field, number in zip(self.numerics, numbers):
+            if number is None:
+                continue
+            if bulk:
+                self._sorted[field].append((number, id_, key))
+            else:
+                insort(self._sorted[field], (number, id_, key))
+
+    def _remove(self, key):
+        values, numbers = self._entries.pop(key)
+        del self.records[key]
+        id_ = self._ids.pop(key)
+        for field, value in zip(self.fields, values):
+            keys = self._hash[field][value]
+            keys.discard(key)
+            totals = self._totals[field][value]
+            if keys:
+                for i, number in enumerate(numbers):
+                    totals[i] -= number or 0.0
+            else:
+                del self._hash[field][value]
+                del self._totals[field][value]
+        for field, number in zip(self.numerics, numbers):
+            if number is not None:
+                index = self._sorted[field]
+                del index[bisect_left(index, (number, id_))]
+
+    def update(self, records, replace=True):
+        """
+        Apply records, touching the indexes only for those that were added,
+        changed or (when replace) dropped.  Returns the counts of each.
+        """
+        if not self.records:
+            return self._load(records)
+        added = changed = 0
+        seen = set()
+        for record in records:
+            key = self.key(record)
+            seen.add(key)
+            entry = self._entry(record)
+            if key in self.records:
+                if self._entries[key] == entry:
+                    # Indexes are unaffected; keep the latest record
+                    self.records[key] = record
+                    continue
+                self._remove(key)
+                changed += 1
+            else:
+                added += 1
+            self._add(key, record, entry)
+        removed = 0
+        if replace:
+            for key in [key for key in self.records if key not in seen]:
+                self._remove(key)
+                removed += 1
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def _load(self, records):
+        # Inserting into a sorted index one record at a time is O(n) each,
+        # so a load into an empty table appends and sorts once at the end
+        latest = {self.key(record): record for record in records}
+        for key, record in latest.items():
+            self._add(key, record, self._entry(record), bulk=True)
+        for index in self._sorted.values():
+            index.sort()
+        return {"added": len(latest), "changed": 0, "removed": 0}
+
+    def _check(self, fields):
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise ValueError(
+                f"Not indexed: {', '.join(sorted(unknown))}; "
+                f"choose from {', '.join(self.fields)}"
+            )
+
+    def find(self, criteria):
+        self._check(criteria)
+        if not criteria:
+            return list(self.records.values())
+        matches = sorted(
+            (self._hash[field].get(value, ()) for field, value in criteria.items()),
+            key=len,
+        )
+        keys = set(matches[0]).intersection(*matches[1:])
+        return [self.records[key] for key in keys]
+
+    def between(self, field, low, high):
+        index = self._sorted[field]
+        start = 0 if low is None else bisect_left(index, (low,))
+        end = len(index) if high is None else bisect_right(index, (high, math.inf))
+        return [self.records[key] for _, _, key in index[start:end]]
+
+    def totals(self, by, field):
+        self._check([by])
+        i = self.numerics.index(field)
+        return {value: totals[i] for value, totals in self._totals[by].items()}
+
+
+class BookIndex:
+    """
+    Holdings and accounts for an advisor's whole book, indexed in memory.
+
+    Holdings and accounts get a hash index on each of their index fields and
+    a sorted index on each numeric field, and running totals of the
+    numerics are kept for every indexed value, so lookups, range queries
+    and totals don't scan the book.  A refresh compares each record with
+    the one it replaces and only updates the indexes for records that were
+    added, changed or dropped.
+
+    Holdings without the investor field are matched to their investor
+    through their account.
+
+    Keyword Arguments
+    -----------------
+    client: Client, default None, optional
+        Client to make requests with.  The shared default client is used
+        when not given.
+    signer: Signer, default None, optional
+    investor_field: str, default "investorId", optional
+    account_field: str, default "accountNumber", optional
+    holding_fields: tuple, default ("symbol", "cusip", "classification"),
+        optional
+        Holding fields to index besides the investor and account fields
+    holding_key: tuple, default ("accountNumber", "symbol", "cusip"),
+        optional
+        Fields that together identify a holding
+    numerics: tuple, default ("marketValue", "quantity"), optional
+        Holding fields with sorted indexes and totals
+    account_numerics: tuple, default ("balance", "marketValue"), optional
+        Account fields with sorted indexes and totals
+    """
+
+    def __init__(
+        self,
+        client=None,
+        signer=None,
+        investor_field="investorId",
+        account_field="accountNumber",
+        holding_fields=("symbol", "cusip", "classification"),
+        holding_key=("accountNumber", "symbol", "cusip"),
+        numerics=("marketValue", "quantity"),
+        account_numerics=("balance", "marketValue"),
+    ):
+        self.client = client
+        self.signer = signer
+        self.investor_field = investor_field
+        self.account_field = account_field
+        self._lock = threading.RLock()
+        self._accounts = _Table(
+            (account_field,), (investor_field, account_field), account_numerics
+        )
+        self._holdings = _Table(
+            holding_key,
+            (investor_field, account_field) + tuple(holding_fields),
+            numerics,
+            resolve=self._resolve,
+        )
+
+    def __repr__(self):
+        return (
+            f"BookIndex({len(self._holdings.records)} holdings, "
+            f"{len(self._accounts.records)} accounts)"
+        )
+
+    def _resolve(self, record, field):
+        value = record.get(field)
+        if value is None and field == self.investor_field:
+            account = self._accounts.records.get(record.get(self.account_field))
+            if account is not None:
+                value = account.get(field)
+        return value
+
+    def refresh(self, **kwargs):
+        """
+        Fetch the advisor's holdings and accounts concurrently and apply
+        them.  Returns the counts of added, changed and removed records by
+        kind.
+
+        Keyword Arguments
+        -----------------
+        Passed through to both endpoints, e.g. ignoreOrion
+        """
+        query_params = dict(kwargs, output="records")
+
+        def fetch(key):
+            return get_data(
+                key,
+                "GET",
+                query_params=query_params,
+                client=self.client,
+                signer=self.signer,
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            accounts = executor.submit(fetch, "Accounts")
+            holdings = executor.submit(fetch, "Holdings")
+            return self.load(holdings.result(), accounts.result())
+
+    def load(self, holdings=None, accounts=None, replace=True):
+        """
+        Apply decoded holdings and/or accounts, e.g. from an investor
+        snapshot or a cassette.  Returns the counts of added, changed
+        and removed records by kind.
+
+        Keyword Arguments
+        -----------------
+        holdings: list, default None, optional
+        accounts: list, default None, optional
+        replace: bool, default True, optional
+            Drop records of a given kind that aren't in its new list.  With
+            False records are only added or updated.
+        """
+        counts = {}
+        with self._lock:
+            # Accounts first, so holdings resolve their investor against them
+            if accounts is not None:
+                counts["accounts"] = self._accounts.update(accounts, replace)
+            if holdings is None and accounts is not None:
+                # Re-resolve the holdings' investors against the new accounts
+                holdings, replace = list(self._holdings.records.values()), False
+            if holdings is not None:
+                counts["holdings"] = self._holdings.update(holdings, replace)
+        return counts
+
+    def holdings(self, **criteria):
+        """
+        Returns the holdings matching every criterion, e.g.
+        `holdings(symbol="VTI", investorId=42)`.  Criteria are indexed
+        fields and values.
+        """
+        with self._lock:
+            return self._holdings.find(criteria)
+
+    def accounts(self, **criteria):
+        """
+        Returns the accounts matching every criterion, e.g.
+        `accounts(investorId=42)`.
+        """
+        with self._lock:
+            return self._accounts.find(criteria)
+
+    def holdings_between(self, field, low=None, high=None):
+        """
+        Returns the holdings whose numeric field is between low and high
+        (inclusive) in ascending order.  Holdings missing the field are
+        left out.
+        """
+        with self._lock:
+            return self._holdings.between(field, low, high)
+
+    def accounts_between(self, field, low=None, high=None):
+        """
+        Returns the accounts whose numeric field is between low and high
+        (inclusive) in ascending order.
+        """
+        with self._lock:
+            return self._accounts.between(field, low, high)
+
+    def holding_totals(self, by, field="marketValue"):
+        """
+        Returns the sum of a numeric holding field for every value of an
+        indexed field, e.g. `holding_totals("classification")`.
+        """
+        with self._lock:
+            return self._holdings.totals(by, field)
+
+    def account_totals(self, by, field="marketValue"):
+        """
+        Returns the sum of a numeric account field for every value of an
+        indexed field, e.g. `account_totals("investorId", "balance")`.
+        """
+        with self._lock:
+            return self._accounts.totals(by, field)
@@ -0,0 +1,173 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from requests import Response
+
+from .investor import (
+    get_investor_bank_transactions,
+    get_investor_brokerage_transactions,
+    get_investor_diversification_holdings,
+    get_investor_holdings,
+    get_investor_transactions,
+)
+from .private import _KEY_NAMES, get_data
+
+
+def _get_investor_ids(keys, client=None):
+    response = get_data("Investors", "GET", query_params=dict(keys), client=client)
+    response.raise_for_status()
+    return [investor["investorId"] for investor in response.json()]
+
+
+def _get_investor_profile(investor_id, **kwargs):
+    # get_investor_profile_adv takes no keyword arguments, so the keys and
+    # output= go straight to the endpoint
+    return get_data(
+        "AdvisorInvestorProfile",
+        "GET",
+        uri_params={"investor_id": investor_id},
+        query_params=kwargs,
+    )
+
+
+def _call(func, investor_id, kwargs):
+    result = func(investor_id, **kwargs)
+    # Other outputs have already raised for a non-2xx response
+    if isinstance(result, Response):
+        result.raise_for_status()
+    return result
+
+
+def fan_out(func, investor_ids=None, max_workers=8, **kwargs):
+    """
+    Call a per-investor function for many investors on a bounded thread
+    pool, yielding `(investor_id, result)` as each request finishes.
+
+    A failed request doesn't stop the batch: its result is the exception
+    that was raised (including the `requests.HTTPError` for a non-2xx
+    response) instead of the response.
+
+    Arguments
+    ---------
+    func: callable, required
+        Function taking an investor_id as its first argument, e.g.
+        `get_investor_holdings`
+    investor_ids: iterable, default None, optional
+        Investors to fetch.  Every investor returned by the investors
+        endpoint is used when not given.
+    max_workers: int, default 8, optional
+        Maximum number of requests in flight at once
+
+    Keyword Arguments
+    -----------------
+    Passed through to every call of func
+    """
+    if investor_ids is None:
+        keys = {k: kwargs[k] for k in _KEY_NAMES if k in kwargs}
+        investor_ids = _get_investor_ids(keys)
+    yield from map_unordered(
+        lambda investor_id: _call(func, investor_id, kwargs), investor_ids, max_workers
+    )
+
+
+def map_unordered(func, items, max_workers=8):
+    """
+    Call func for every item on a bounded thread pool, yielding
+    `(item, result)` as each call finishes.  A call that raises yields the
+    exception as its result.
+
+    Arguments
+    ---------
+    func: callable, required
+        Function taking one item
+    items: iterable, required
+    max_workers: int, default 8, optional
+        Maximum number of calls running at once
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        while True:
+            # Only keep a couple of calls queued per worker so huge batches
+            # don't build up thousands of futures (or responses) at once
+            for item in items:
+                pending[executor.submit(func, item)] = item
+                if len(pending) >= max_workers * 2:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result()
+                except Exception as e:
+                    yield item, e
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def get_all_investor_bank_transactions(investor_ids=None, max_workers=8, **kwargs):
+    """
+    Yields `(investor_id, result)` from `get_investor_bank_transactions`
+    for many investors at once.  See `fan_out` for the arguments and how
+    failures are reported.
+    """
+    return fan_out(
+        get_investor_bank_transactions, investor_ids, max_workers, **kwargs
+    )
+
+
+def get_all_investor_brokerage_transactions(
+    investor_ids=None, max_workers=8, **kwargs
+):
+    """
+    Yields `(investor_id, result)` from `get_investor_brokerage_transactions`
+    for many investors at once.  See `fan_out` for the arguments and how
+    failures are reported.
+    """
+    return fan_out(
+        get_investor_brokerage_transactions, investor_ids, max_workers, **kwargs
+    )
+
+
+def get_all_investor_diversification_holdings(
+    investor_ids=None, max_workers=8, **kwargs
+):
+    """
+    Yields `(investor_id, result)` from
+    `get_investor_diversification_holdings` for many investors at once.  See
+    `fan_out` for the arguments and how failures are reported.
+    """
+    return fan_out(
+        get_investor_diversification_holdings, investor_ids, max_workers, **kwargs
+    )
+
+
+def get_all_investor_holdings(investor_ids=None, max_workers=8, **kwargs):
+    """
+    Yields `(investor_id, result)` from `get_investor_holdings` for many
+    investors at once.  See `fan_out` for the arguments and how failures are
+    reported.
+    """
+    return fan_out(get_investor_holdings, investor_ids, max_workers, **kwargs)
+
+
+def get_all_investor_profiles(investor_ids=None, max_workers=8, **kwargs):
+    """
+    Yields `(investor_id, result)` from `get_investor_profile_adv` for many
+    investors at once.  See `fan_out` for the arguments and how failures are
+    reported.
+    """
+    return fan_out(_get_investor_profile, investor_ids, max_workers, **kwargs)
+
+
+def get_all_investor_transactions(investor_ids=None, max_workers=8, **kwargs):
+    """
+    Yields `(investor_id, result)` from `get_investor_transactions` for many
+    investors at once.  See `fan_out` for the arguments and how failures are
+    reported.
+    """
+    return fan_out(get_investor_transactions, investor_ids, max_workers, **kwargs)
@@ -0,0 +1,304 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+# Reference data that changes at most daily.  Every other endpoint is only
+# cached when given a TTL.
+DEFAULT_TTLS = {
+    "Classifications": 3600,
+    "Diversifications": 3600,
+    "Investors": 600,
+    "AdvisorInvestorProfile": 600,
+}
+
+
+class BaseCache:
+    """
+    Interface a Client uses to cache successful GET responses.
+
+    Responses are keyed by user, method, requested URI and the sorted query
+    string used to sign the request.  A cache may return a response with
+    `stale` set to True; the client hands it back right away and refreshes
+    the entry in the background.
+
+    Keyword Arguments
+    -----------------
+    ttls: dict, default DEFAULT_TTLS, optional
+        Seconds to keep responses for, by endpoint key (e.g. "Investors").
+        Endpoints missing from the dict use ttl.
+    ttl: int, default 0, optional
+        Seconds to keep responses from any other endpoint, 0 to not cache
+        them
+    """
+
+    def __init__(self, ttls=None, ttl=0):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, endpoint_key):
+        return self.ttls.get(endpoint_key, self.ttl)
+
+    def get(self, cache_key):
+        raise NotImplementedError()
+
+    def set(self, cache_key, endpoint_key, response):
+        raise NotImplementedError()
+
+    def invalidate(self, *endpoint_keys):
+        """
+        Drop every response cached for the given endpoint keys, or all of
+        them when none are given.
+        """
+        raise NotImplementedError()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryCache(BaseCache):
+    """
+    In-memory LRU cache of successful GET responses, opted into by passing
+    it to a Client.
+
+    Keyword Arguments
+    -----------------
+    ttls: dict, default DEFAULT_TTLS, optional
+        Seconds to keep responses for, by endpoint key (e.g. "Investors").
+        Endpoints missing from the dict use ttl.
+    ttl: int, default 0, optional
+        Seconds to keep responses from any other endpoint, 0 to not cache
+        them
+    max_entries: int, default 1024, optional
+        Maximum number of responses kept
+    max_bytes: int, default None, optional
+        Maximum total size of the response bodies kept
+    """
+
+    def __init__(self, ttls=None, ttl=0, max_entries=1024, max_bytes=None):
+        super().__init__(ttls, ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(cache_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, cache_key, endpoint_key, response):
+        ttl = self.ttl_for(endpoint_key)
+        if not ttl:
+            return
+        size = len(response.content)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            self._entries[cache_key] = (
+                time.monotonic() + ttl,
+                endpoint_key,
+                response,
+                size,
+            )
+            self.size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *endpoint_keys):
+        with self._lock:
+            if not endpoint_keys:
+                self._entries.clear()
+                self.size = 0
+                return
+            for cache_key, entry in list(self._entries.items()):
+                if entry[1] in endpoint_keys:
+                    self._remove(cache_key)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def _remove(self, cache_key):
+        entry = self._entries.pop(cache_key)
+        self.size -= entry[3]
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache of successful GET responses stored in a SQLite database, so it
+    survives restarts and can be shared by every process on a host.
+
+    The database runs in WAL mode, which lets many processes read while one
+    writes.  Each thread (and each process) opens its own connection.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file.  It's created when it doesn't exist.
+
+    Keyword Arguments
+    -----------------
+    ttls: dict, default DEFAULT_TTLS, optional
+        Seconds to keep responses for, by endpoint key
+    ttl: int, default 0, optional
+        Seconds to keep responses from any other endpoint
+    stale_ttl: int, default 0, optional
+        Seconds after a response expires during which it's still returned
+        (flagged as stale) while the client refreshes it in the background
+    max_entries: int, default None, optional
+        Maximum number of responses kept; the oldest are dropped first
+    timeout: float, default 30, optional
+        Seconds to wait for another process's write lock
+    """
+
+    def __init__(
+        self, path, ttls=None, ttl=0, stale_ttl=0, max_entries=None, timeout=30
+    ):
+        super().__init__(ttls, ttl)
+        self.path = path
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    cache_key TEXT PRIMARY KEY,
+                    endpoint_key TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    url TEXT,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_stored_at "
+                "ON responses (stored_at)"
+            )
+
+    def __len__(self):
+        query = "SELECT COUNT(*) FROM responses"
+        return self._connection().execute(query).fetchone()[0]
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, cache_key):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT status_code, headers, content, url, stored_at, expires_at "
+                "FROM responses WHERE cache_key = ?",
+                (cache_key,),
+            )
+            .fetchone()
+        )
+        now = time.time()
+        if row is None or row[5] + self.stale_ttl <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        status_code, headers, content, url, stored_at, expires_at = row
+        response = Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = url
+        response.stored_at = stored_at
+        response.stale = expires_at <= now
+        return response
+
+    def set(self, cache_key, endpoint_key, response):
+        ttl = self.ttl_for(endpoint_key)
+        if not ttl:
+            return
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key,
+                    endpoint_key,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    response.content,
+                    response.url,
+                    now,
+                    now + ttl,
+                ),
+            )
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM responses WHERE cache_key IN ("
+                    "SELECT cache_key FROM responses ORDER BY stored_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def invalidate(self, *endpoint_keys):
+        with self._connection() as conn:
+            if not endpoint_keys:
+                conn.execute("DELETE FROM responses")
+                return
+            conn.execute(
+                "DELETE FROM responses WHERE endpoint_key IN "
+                f"({', '.join('?' * len(endpoint_keys))})",
+                endpoint_keys,
+            )
+
+    def purge(self):
+        """
+        Delete responses past their stale window.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM responses WHERE expires_at + ? <= ?",
+                (self.stale_ttl, time.time()),
+            )
+
+    def stats(self):
+        return dict(super().stats(), entries=len(self))
@@ -0,0 +1,166 @@
+"""
+Record responses to a file and replay them later without the network.
+
+A cassette is an append-only file of recordings, each a JSON header line
+followed by the (zlib-compressed) body.  Recordings are keyed by endpoint
+key, method, requested URI and sorted query string, never by the
+timestamp or signature, so a replayed run gets the same responses however
+long after the recording it happens.
+"""
+import io
+import json
+import os
+import threading
+import zlib
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+MODES = ("record", "replay", "auto")
+
+# Describe the body as it came off the wire, not as it's stored
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class Cassette:
+    """
+    Recordings of Wealth Access responses, stored in a single file.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the cassette file.  It's created when it doesn't exist.
+
+    Keyword Arguments
+    -----------------
+    mode: str, default "replay", optional
+        "record" sends every request and records the response, replacing
+        any earlier recording.  "replay" answers every request from the
+        cassette and raises LookupError for one that wasn't recorded.
+        "auto" replays what was recorded and records the rest.  Requests
+        with extra headers (e.g. Range) or a body are never recorded, and
+        raise LookupError when replaying.
+    compress: bool, default True, optional
+        Compress bodies with zlib as they're recorded
+    """
+
+    def __init__(self, path, mode="replay", compress=True):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.compress = compress
+        self._index = {}
+        self._lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self):
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            for line in iter(f.readline, b""):
+                # A recording cut short by a crash is ignored
+                if not line.endswith(b"\n"):
+                    break
+                header = json.loads(line)
+                offset = f.tell()
+                if offset + header["length"] > size:
+                    break
+                f.seek(header["length"], os.SEEK_CUR)
+                self._index[header["recording"]] = (offset, header)
+
+    def play(self, key, method, requested_uri, sorted_params):
+        """
+        Returns the recorded response, or None when the request should go
+        out over the network.
+        """
+        if self.mode == "record":
+            return None
+        recording = _recording(key, method, requested_uri, sorted_params)
+        entry = self._index.get(recording)
+        if entry is None:
+            if self.mode == "replay":
+                raise LookupError(f"{self.path} has no recording of {recording}")
+            return None
+        offset, header = entry
+        with self._lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            content = self._reader.read(header["length"])
+        if header["compressed"]:
+            content = zlib.decompress(content)
+        response = Response()
+        response.status_code = header["status_code"]
+        response.headers = CaseInsensitiveDict(header["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        # Reading or closing it as a stream works as it would on a live one
+        response._content_consumed = True
+        response.raw = io.BytesIO(content)
+        response.url = header["url"]
+        return response
+
+    def record(self, key, method, requested_uri, sorted_params, response):
+        """
+        Append the response to the cassette, unless it's only replayed.
+        """
+        if self.mode == "replay":
+            return
+        # A streamed response is read into memory here, and its caller
+        # iterates over that copy
+        content = response.content
+        if self.compress:
+            content = zlib.compress(content)
+        header = {
+            "recording": _recording(key, method, requested_uri, sorted_params),
+            "key": key,
+            "status_code": response.status_code,
+            "headers": {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in _DROPPED_HEADERS
+            },
+            "url": response.url,
+            "length": len(content),
+            "compressed": self.compress,
+        }
+        line = json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._writer is None:
+                self._writer = open(self.path, "ab")
+            self._writer.write(line)
+            offset = self._writer.tell()
+            self._writer.write(content)
+            self._writer.flush()
+            self._index[header["recording"]] = (offset, header)
+
+    def keys(self):
+        """
+        Endpoint keys with at least one recording.
+        """
+        return sorted({header["key"] for _, header in self._index.values()})
+
+    def close(self):
+        with self._lock:
+            for f in (self._reader, self._writer):
+                if f is not None:
+                    f.close()
+            self._reader = self._writer = None
+
+
+def _recording(key, method, requested_uri, sorted_params):
+    return f"{key} {method} {requested_uri}?{sorted_params or ''}"
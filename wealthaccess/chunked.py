@@ -0,0 +1,258 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import requests
+
+from .columnar import convert_records
+from .investor import (
+    get_investor_account_transactions,
+    get_investor_bank_transactions,
+    get_investor_brokerage_transactions,
+    get_investor_transactions,
+)
+
+_PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def _next_period(day, months):
+    # First day of the calendar month, quarter or year after day
+    month = (day.month - 1) // months * months + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def date_windows(start, end, chunk="month"):
+    """
+    Split the date range from start to end (both inclusive) into
+    consecutive, non-overlapping `(start, end)` windows.
+
+    Arguments
+    ---------
+    start: date or str, required
+    end: date or str, required
+
+    Keyword Arguments
+    -----------------
+    chunk: str, int or timedelta, default "month", optional
+        "month", "quarter" or "year" to split on calendar boundaries, or a
+        number of days
+    """
+    start, end = _to_date(start), _to_date(end)
+    if isinstance(chunk, int):
+        chunk = timedelta(days=chunk)
+    while start <= end:
+        if isinstance(chunk, timedelta):
+            following = start + max(chunk, timedelta(days=1))
+        else:
+            following = _next_period(start, _PERIOD_MONTHS[chunk])
+        yield start, min(following - timedelta(days=1), end)
+        start = following
+
+
+def _id_order(value):
+    # Numeric ids sort as numbers, so 9 comes before 10
+    try:
+        return 0, int(value), ""
+    except (TypeError, ValueError):
+        return 1, 0, "" if value is None else str(value)
+
+
+def _is_retryable(e):
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return True
+    response = getattr(e, "response", None)
+    return response is not None and response.status_code >= 500
+
+
+def _fetch_window(func, args, kwargs, start, end):
+    try:
+        # Raises the HTTPError for a failed window itself
+        return func(
+            *args,
+            startDate=start.isoformat(),
+            endDate=end.isoformat(),
+            output="records",
+            **kwargs,
+        )
+    except requests.RequestException as e:
+        # A window too big to come back in time is split in two and tried
+        # again, down to a single day
+        if start >= end or not _is_retryable(e):
+            raise
+        middle = start + (end - start) // 2
+        return _fetch_window(func, args, kwargs, start, middle) + _fetch_window(
+            func, args, kwargs, middle + timedelta(days=1), end
+        )
+
+
+def _adaptive_days(func, args, kwargs, start, end, target_records):
+    # Fetch the first month to estimate how many records a day returns and
+    # size the rest of the windows to hold roughly target_records each
+    probe_end = min(start + timedelta(days=30), end)
+    records = _fetch_window(func, args, kwargs, start, probe_end)
+    per_day = len(records) / ((probe_end - start).days + 1)
+    days = int(target_records / per_day) if per_day else 366
+    return records, probe_end, min(max(days, 1), 366)
+
+
+def fetch_chunked(
+    func,
+    *args,
+    startDate,
+    endDate=None,
+    chunk="month",
+    max_workers=4,
+    target_records=50000,
+    id_field="transactionId",
+    date_field="transactionDate",
+    key=None,
+    output="records",
+    **kwargs,
+):
+    """
+    Split a date range into windows, fetch them concurrently and merge the
+    records into one list ordered by date, dropping duplicates returned by
+    neighbouring windows.
+
+    A window that times out or returns a 5xx status is split in half and
+    fetched again.
+
+    Arguments
+    ---------
+    func: callable, required
+        Function taking startDate and endDate keyword arguments, e.g.
+        `get_investor_transactions`
+    *args:
+        Passed through to func, e.g. the investor_id
+
+    Keyword Arguments
+    -----------------
+    startDate: date or str, required
+        First date of the range
+    endDate: date or str, default today, optional
+        Last date of the range
+    chunk: str, int or timedelta, default "month", optional
+        "month", "quarter", "year", a number of days, or "adaptive" to size
+        windows from the number of records the first month returns
+    max_workers: int, default 4, optional
+        Maximum number of windows fetched at once
+    target_records: int, default 50000, optional
+        Records per window to aim for when chunk is "adaptive"
+    id_field: str, default "transactionId", optional
+        Field used to drop duplicate records
+    date_field: str, default "transactionDate", optional
+        Field the merged records are ordered by
+    key: str, default None, optional
+        Endpoint key func requests, for converting to the output
+    output: str, default "records", optional
+        "dataframe", "arrow" or "models" to convert the merged records (see
+        `columnar.convert_records`)
+    **kwargs:
+        Passed through to func
+    """
+    if output is None:
+        output = "records"
+    # Fails on an output that can't be made before anything is fetched
+    convert_records([], key, output)
+    start = _to_date(startDate)
+    end = _to_date(endDate or date.today())
+    batches = []
+    if chunk == "adaptive":
+        records, probe_end, chunk = _adaptive_days(
+            func, args, kwargs, start, end, target_records
+        )
+        batches.append(records)
+        start = probe_end + timedelta(days=1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_window, func, args, kwargs, window_start, window_end)
+            for window_start, window_end in date_windows(start, end, chunk)
+        ]
+        batches.extend(future.result() for future in futures)
+    merged = {}
+    for records in batches:
+        for record in records:
+            merged[record.get(id_field, id(record))] = record
+    records = sorted(
+        merged.values(),
+        key=lambda r: (str(r.get(date_field) or ""), _id_order(r.get(id_field))),
+    )
+    return convert_records(records, key, output)
+
+
+def get_investor_account_transactions_chunked(
+    client_identifier, account_number, startDate, endDate=None, **kwargs
+):
+    """
+    `get_investor_account_transactions` over a date range split into
+    windows fetched concurrently.  Returns the merged transactions; see
+    `fetch_chunked` for the keyword arguments.
+    """
+    return fetch_chunked(
+        get_investor_account_transactions,
+        client_identifier,
+        account_number,
+        startDate=startDate,
+        endDate=endDate,
+        key="InvestorAccountTransactions",
+        **kwargs,
+    )
+
+
+def get_investor_bank_transactions_chunked(
+    investor_id, startDate, endDate=None, **kwargs
+):
+    """
+    `get_investor_bank_transactions` over a date range split into windows
+    fetched concurrently.  Returns the merged transactions; see
+    `fetch_chunked` for the keyword arguments.
+    """
+    return fetch_chunked(
+        get_investor_bank_transactions,
+        investor_id,
+        startDate=startDate,
+        endDate=endDate,
+        key="AdvisorInvestorBankTransactions",
+        **kwargs,
+    )
+
+
+def get_investor_brokerage_transactions_chunked(
+    investor_id, startDate, endDate=None, **kwargs
+):
+    """
+    `get_investor_brokerage_transactions` over a date range split into
+    windows fetched concurrently.  Returns the merged transactions; see
+    `fetch_chunked` for the keyword arguments.
+    """
+    return fetch_chunked(
+        get_investor_brokerage_transactions,
+        investor_id,
+        startDate=startDate,
+        endDate=endDate,
+        key="AdvisorInvestorBrokerageTransactions",
+        **kwargs,
+    )
+
+
+def get_investor_transactions_chunked(investor_id, startDate, endDate=None, **kwargs):
+    """
+    `get_investor_transactions` over a date range split into windows
+    fetched concurrently.  Returns the merged transactions; see
+    `fetch_chunked` for the keyword arguments.
+    """
+    return fetch_chunked(
+        get_investor_transactions,
+        investor_id,
+        startDate=startDate,
+        endDate=endDate,
+        key="AdvisorInvestorTransactions",
+        **kwargs,
+    )
@@ -1,159 +1,91 @@
-import base64
-import hashlib
-import hmac
 import os
-from datetime import datetime
 
-import requests
-
-from pytz import timezone
+from .auth import Credentials, Signer
+from .client import Client, get_client
+from .documents import (
+    download_investor_document,
+    upload_investor_document,
+    walk_investor_documents,
+)
+from .endpoints import ENDPOINTS
+from .private import get_data
+from .snapshot import DEFAULT_PARTS, get_investor_snapshot
 
 
 class _WealthAccessBase:
 
-    BASE_URL = "https://api.wealthaccess.com"
     USER_GUID = os.getenv("WA_USER_GUID", "10fdc84d-1da4-435f-9a6b-323156beedbd")
     API_KEY = os.getenv("WA_API_KEY", "5e43bccb-c019-4a4d-ac65-7c4eaf4337ef")
     SECRET_KEY = os.getenv("WA_SECRET_KEY", "CGoAQFT3RF1=")
 
-    _CONFIG = {
-        "ADVISOR": {
-            "Investors": {"uri": "/api/v2/advisor/investors", "params": []},
-            "Transactions": {
-                "uri": "/api/v2/advisor/transactions",
-                "params": ["startDate", "endDate", "transactionId", "ignoreOrion"],
-            },
-            "Diversifications": {
-                "uri": "/api/v2/Advisor/Diversifications",
-                "params": [],
-            },
-            "AdvisorInvestorProfile": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/profile",
-                "params": [],
-            },
-            "AdvisorInvestorDocumentsList": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/documents",
-                "params": ["parentId", "searchTerm"],
-            },
-            "AdvisorInvestorDocumentsDetail": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/documents/{vault_file_id}",
-                "params": ["IsPreview", "AdvisorId", "vaultFileId"],
-            },
-            "AdvisorInvestorDocumentPost": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/documents",
-                "params": ["request", "investorId"],
-            },
-            "AdvisorInvestorTransactions": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/transactions",
-                "params": ["startDate", "endDate", "ignoreOrion"],
-            },
-            "AdvisorInvestorBankTransactions": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/banktransactions",
-                "params": ["hideTransfers", "startDate", "endDate", "ignoreOrion"],
-            },
-            "AdvisorInvestorBrokerageTransactions": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/brokeragetransactions",
-                "params": ["hideTransfers", "startDate", "endDate", "ignoreOrion"],
-            },
-            "AdvisorInvestorHoldings": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/holdings",
-                "params": ["ignoreOrion"],
-            },
-            "AdvisorInvestorDiversificationHoldings": {
-                "uri": "/api/v2/advisor/investors/{investor_id}/diversificationholdings",
-                "params": ["diversificationId", "categoryId", "ignoreOrion"],
-            },
-            "Classifications": {"uri": "/api/v2/Advisor/Classifications", "params": []},
-            "Accounts": {"uri": "/api/v2/advisor/accounts", "params": ["ignoreOrion"]},
-            "Holdings": {"uri": "/api/v2/advisor/holdings", "params": ["ignoreOrion"]},
-        },
-        "INVESTOR": {
-            "InvestorAccountTransactions": {
-                "uri": "/api/v2/investor/accounts/transactions",
-                "params": ["clientIdentifier", "accountNumber", "startDate", "endDate"],
-            },
-            "InvestorAccounts": {
-                "uri": "/api/v2/investor/accounts",
-                "params": ["clientIdentifier"],
-            },
-            "InvestorProfile": {
-                "uri": "/api/v2/investor/profile",
-                "params": ["clientIdentifier"],
-            },
-        },
-        "FIRM": {
-            "FirmInvestors": {"uri": "/api/v2/firm/investors", "params": ["firm"]}
-        },
-    }
-
-    def __init__(self, **kwargs):
-        pass
+    def __init__(self, client=None, credentials=None, **client_options):
+        if client is not None and client_options:
+            raise TypeError("Pass either a client or options for a new one")
+        # Only a client built here is closed with the instance; one passed in
+        # may be shared (e.g. through set_client)
+        self._owns_client = bool(client_options)
+        self._client = Client(**client_options) if client_options else client
+        self._credentials = credentials
+        self._signer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def client(self):
+        return self._client or get_client()
+
+    @property
+    def signer(self):
+        """
+        Signs with the credentials given to the instance, else the keys set
+        on a subclass, else the client's credentials, and only then the
+        class-level keys read from the environment.
+        """
+        if self._signer is not None:
+            return self._signer
+        credentials = self._credentials
+        if credentials is None and not self._keys_overridden():
+            client = self.client
+            if client.credentials is not None:
+                return client.signer
+        if credentials is None:
+            credentials = Credentials(self.API_KEY, self.SECRET_KEY, self.USER_GUID)
+        self._signer = Signer(credentials)
+        return self._signer
+
+    def _keys_overridden(self):
+        return any(
+            getattr(self, name) != getattr(_WealthAccessBase, name)
+            for name in ("API_KEY", "SECRET_KEY", "USER_GUID")
+        )
+
+    def close(self):
+        """
+        Close the client this instance built from its options.  A client
+        passed in, and the shared default client, are left open for whoever
+        else uses them.
+        """
+        if self._owns_client:
+            self._client.close()
 
     @property
     def MAIN_KEY(self):
         raise NotImplementedError()
 
     def _get_data(self, key, method, uri_params={}, query_params={}):
-        config = self._CONFIG[self.MAIN_KEY][key]
-        requested_uri = self._construct_uri(config["uri"], uri_params)
-        query_params = self._construct_query_params(config, query_params)
-        print("params: ", query_params)
-        sorted_params = self._construct_sorted_parameters(query_params)
-        print("sorted params: ", sorted_params)
-        headers = self._create_headers(requested_uri, sorted_params, method)
-        print("headers: ", headers)
-        response = self._make_request(requested_uri, headers, query_params, method)
-        return response
-
-    def _construct_uri(self, uri, uri_params):
-        if uri_params:
-            return uri.format(**uri_params)
-        return uri
-
-    def _construct_query_params(self, config, query_params):
-        if "params" in config and query_params:
-            params = {k: query_params[k] for k in config["params"]}
-            return {
-                k: str(v).lower() if v is True or v is False else v
-                for k, v in params.items()
-            }
-        return query_params
-
-    def _construct_sorted_parameters(self, query_parameters):
-        if query_parameters:
-            query_parameter_strings = []
-            for k, v in sorted(query_parameters.items()):
-                query_parameter_strings.append(f"{k}={v}")
-            return "&".join(query_parameter_strings)
-        return query_parameters
-
-    def _create_headers(self, requested_uri, sorted_parameters, method):
-        gmt_time = datetime.now(timezone("GMT")).strftime("%a, %d %b %Y %H:%M:%S %Z")
-        signature = self._signature(gmt_time, requested_uri, sorted_parameters, method)
-        return {
-            "Authorization": f"WAS {self.USER_GUID}:{signature}",
-            "x-WAApiKey": self.API_KEY,
-            "x-WATimestamp": gmt_time,
-        }
-
-    def _signature(self, gmt_time, requested_uri, sorted_parameters, method):
-        string = f"{self.API_KEY}\n{method}\n{gmt_time}\n{requested_uri}\n"
-        if sorted_parameters:
-            string += f"{sorted_parameters}"
-        message = bytes(string, "utf-8")
-        print("message is", message)
-        secret = bytes(self.SECRET_KEY, "utf-8")
-        signature = base64.b64encode(
-            hmac.new(secret, message, digestmod=hashlib.sha256).digest()
-        )
-        return signature.decode("utf-8")
-
-    def _make_request(self, requested_uri, headers, query_params, method):
-        return requests.request(
-            method=method,
-            url=f"{self.BASE_URL}{requested_uri}",
-            params=query_params,
-            headers=headers,
+        if ENDPOINTS[key].hierarchy != self.MAIN_KEY:
+            raise KeyError(key)
+        return get_data(
+            key,
+            method,
+            uri_params,
+            query_params,
+            client=self.client,
+            signer=self.signer,
         )
 
     def _validate_request(self):
@@ -164,9 +96,6 @@ class Advisor(_WealthAccessBase):
 
     MAIN_KEY = "ADVISOR"
 
-    def __init__(self):
-        pass
-
     # INVESTORS
     def get_investor_bank_transactions(self, investor_id, **kwargs):
         """
@@ -272,12 +201,39 @@ class Advisor(_WealthAccessBase):
         vaultFileId: str, default None, optional
         """
         return self._get_data(
-            key="AdvisorInvestorDocumentsList",
+            key="AdvisorInvestorDocumentsDetail",
             method="GET",
             uri_params={"investor_id": investor_id, "vault_file_id": vault_file_id},
             query_params=kwargs,
         )
 
+    def download_investor_document(
+        self, investor_id, vault_file_id, destination, **kwargs
+    ):
+        """
+        Stream a document to a path or binary file object, resuming a partial
+        download, and return its size in bytes.  See
+        `wealthaccess.download_investor_document`.
+
+        Arguments
+        ---------
+        investor_id: int, required
+            Investor specified by the investorId returned from the investors
+            endpoint.
+        vault_file_id: int, required
+            Document specified by its vaultFileId
+        destination: str, path or file-like, required
+            Where to write the document
+        """
+        return download_investor_document(
+            investor_id,
+            vault_file_id,
+            destination,
+            client=self.client,
+            signer=self.signer,
+            **kwargs,
+        )
+
     def get_investor_documents(self, investor_id, **kwargs):
         """
         Returns a list of documents for a given investor. Investor is specified
@@ -340,6 +296,31 @@ class Advisor(_WealthAccessBase):
             "AdvisorInvestorProfile", "GET", uri_params={"investor_id": investor_id}
         )
 
+    def get_investor_snapshot(self, investor_id, parts=DEFAULT_PARTS, **kwargs):
+        """
+        Returns an InvestorSnapshot with the decoded profile, holdings,
+        transactions, documents, etc. for a given investor, fetched
+        concurrently.
+
+        Arguments
+        ---------
+        investor_id: int
+            Investor specified by the investorId returned from the investors
+            endpoint.
+        parts: iterable, default DEFAULT_PARTS, optional
+            Parts to fetch: profile, holdings, diversification_holdings,
+            transactions, bank_transactions, brokerage_transactions and
+            documents
+
+        Keyword Arguments
+        -----------------
+        Query parameters, e.g. startDate or ignoreOrion, passed to every part
+        whose endpoint accepts them
+        """
+        return get_investor_snapshot(
+            investor_id, parts, client=self.client, signer=self.signer, **kwargs
+        )
+
     def get_investor_transactions(self, investor_id, **kwargs):
         """
         Returns a list of brokerage transactions for a given investor.
@@ -376,6 +357,44 @@ class Advisor(_WealthAccessBase):
             query_params=dict(kwargs, investorId=investor_id),
         )
 
+    def upload_investor_document(self, investor_id, source, **kwargs):
+        """
+        Upload a file to an investor's documents as a streamed multipart
+        body.  See `wealthaccess.upload_investor_document`.
+
+        Arguments
+        ---------
+        investor_id: int, required
+            Investor specified by the investorId returned from the investors
+            endpoint.
+        source: str, path or file-like, required
+            Path to the file, or a binary file object
+        """
+        return upload_investor_document(
+            investor_id, source, client=self.client, signer=self.signer, **kwargs
+        )
+
+    def walk_investor_documents(self, investor_id, **kwargs):
+        """
+        Yields `(path, metadata)` for every file in an investor's document
+        vault, listing folders concurrently.  See
+        `wealthaccess.walk_investor_documents`.
+
+        Arguments
+        ---------
+        investor_id: int, required
+            Investor specified by the investorId returned from the investors
+            endpoint.
+
+        Keyword Arguments
+        -----------------
+        searchTerm: str, default None, optional
+            Passed to every folder listing, so the API filters each level
+        """
+        return walk_investor_documents(
+            investor_id, client=self.client, signer=self.signer, **kwargs
+        )
+
     # ADVISOR
     def get_accounts(self, **kwargs):
         """
@@ -440,9 +459,6 @@ class Investor(_WealthAccessBase):
 
     MAIN_KEY = "INVESTOR"
 
-    def __init__(self):
-        pass
-
     def get_account_transactions(self, client_identifier, account_number, **kwargs):
         """
         Returns a list of transactions for a given account and user.
@@ -504,9 +520,6 @@ class Firm(_WealthAccessBase):
 
     MAIN_KEY = "FIRM"
 
-    def __init__(self):
-        pass
-
     def get_clients(self, firm):
         """
         Returns a list of all clients under a firm.
@@ -0,0 +1,443 @@
+import threading
+import time
+from time import perf_counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .auth import Credentials, Signer
+from .coalesce import SingleFlight
+from .columnar import convert
+
+
+BASE_URL = "https://api.wealthaccess.com"
+
+
+class Client:
+    """
+    Owns the pooled, keep-alive HTTP session used to talk to Wealth Access.
+
+    A single client is shared by the functional API (see `get_client` and
+    `set_client`) and by any Advisor, Investor or Firm instance it's handed
+    to, so every request reuses already-open TCP+TLS connections.
+
+    Keyword Arguments
+    -----------------
+    pool_connections: int, default 10, optional
+        Number of per-host connection pools to keep
+    pool_maxsize: int, default 10, optional
+        Maximum number of connections kept alive for a single host
+    pool_block: bool, default False, optional
+        When True, a request waits for a free connection once a host's pool
+        is exhausted instead of opening an extra, throwaway connection.  Use
+        it together with pool_maxsize to enforce a hard per-host limit.
+    keep_alive: bool, default True, optional
+        Keep connections open between requests
+    timeout: float or tuple, default None, optional
+        Timeout passed to every request, either a single value or a
+        (connect, read) tuple
+    base_url: str, default https://api.wealthaccess.com, optional
+        Root URL the endpoint URIs are appended to
+    credentials: Credentials, default None, optional
+        Keys used to sign requests.  They're read from the environment on
+        the first request when not given.
+    cache: MemoryCache or SQLiteCache, default None, optional
+        Cache for GET responses.  Nothing is cached when not given.
+    rate_limiter: RateLimiter, default None, optional
+        Global and per-endpoint request budgets
+    retry: Retry, default None, optional
+        When to retry throttled or failed requests.  Nothing is retried when
+        not given.
+    coalesce: bool, default False, optional
+        Let concurrent threads making an identical GET request share one
+        round-trip and one decoded result.  Callers then get the same
+        object, so they shouldn't modify it.
+    metrics: Metrics, default None, optional
+        Registry recording per-endpoint phase timings, response sizes,
+        statuses, retries and errors.  Nothing is measured when not given.
+    cassette: Cassette, default None, optional
+        Records responses to, or replays them from, a file instead of the
+        network (see `cassette.Cassette`)
+    """
+
+    def __init__(
+        self,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        keep_alive=True,
+        timeout=None,
+        base_url=BASE_URL,
+        credentials=None,
+        cache=None,
+        rate_limiter=None,
+        retry=None,
+        coalesce=False,
+        metrics=None,
+        cassette=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.credentials = credentials
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.flights = SingleFlight() if coalesce else None
+        self.metrics = metrics
+        self.cassette = cassette
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        self._signer = None
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = (HTTPAdapter if metrics is None else _TimedAdapter)(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def signer(self):
+        if self._signer is None:
+            self._signer = Signer(self.credentials or Credentials())
+        return self._signer
+
+    def send(
+        self,
+        key,
+        method,
+        requested_uri,
+        query_params,
+        sorted_params,
+        signer,
+        stream=False,
+        output=None,
+        phases=None,
+        headers=None,
+        data=None,
+    ):
+        """
+        Sign and send a request for the endpoint key, answering it from the
+        cache or an identical request in flight when possible, and return it
+        in the requested output (see `columnar.convert`).
+
+        Streamed requests and requests with extra headers (e.g. Range) or a
+        body are never cached or shared.  Streamed GETs are recorded and
+        replayed like any other; the others always go over the network, and
+        raise LookupError when the cassette only replays.
+
+        `phases` holds the seconds already spent on the request, e.g.
+        building its parameters, and is only used when the client has
+        metrics.
+        """
+        request = (key, method, requested_uri, query_params, sorted_params, signer)
+        if self.metrics is None:
+            return self._send(request, stream, output, headers, data)
+        event = {
+            "key": key,
+            "method": method,
+            "status": None,
+            "bytes": None,
+            "retries": 0,
+            "cached": False,
+            "error": None,
+            "phases": {} if phases is None else phases,
+        }
+        try:
+            return self._send(request, stream, output, headers, data, event)
+        except Exception as e:
+            event["error"] = e
+            raise
+        finally:
+            self.metrics.record(event)
+
+    def _send(self, request, stream, output, headers=None, data=None, event=None):
+        key, method, requested_uri, _, sorted_params, signer = request
+        if stream or headers or data is not None:
+            response = self._transmit(
+                *request, stream=stream, headers=headers, data=data, event=event
+            )
+            return response if stream else self._convert(response, key, output, event)
+        request_key = _request_key(signer, method, requested_uri, sorted_params)
+        if self.flights is not None and method == "GET":
+            return self.flights.do(
+                f"{request_key} {output}",
+                lambda: self._convert(
+                    self._get(request_key, *request, event=event), key, output, event
+                ),
+            )
+        return self._convert(
+            self._get(request_key, *request, event=event), key, output, event
+        )
+
+    def _convert(self, response, key, output, event):
+        if event is None or output in (None, "response"):
+            return convert(response, key, output)
+        start = perf_counter()
+        result = convert(response, key, output)
+        event["phases"]["decode"] = perf_counter() - start
+        return result
+
+    def _get(self, request_key, key, method, *request, event=None):
+        if self.cache is None or method != "GET" or not self.cache.ttl_for(key):
+            return self._fetch(None, key, method, *request, event=event)
+        response = self.cache.get(request_key)
+        if response is None:
+            return self._fetch(request_key, key, method, *request, event=event)
+        if event is not None:
+            event["cached"] = True
+        if getattr(response, "stale", False):
+            self._revalidate(request_key, key, method, *request)
+        return response
+
+    def _fetch(self, cache_key, key, *request, event=None):
+        response = self._transmit(key, *request, event=event)
+        if cache_key is not None and response.ok:
+            self.cache.set(cache_key, key, response)
+        return response
+
+    def _transmit(
+        self,
+        key,
+        method,
+        requested_uri,
+        query_params,
+        sorted_params,
+        signer,
+        stream=False,
+        headers=None,
+        data=None,
+        event=None,
+    ):
+        # Extra headers (e.g. Range) and bodies can change the response, and
+        # the cassette's keys don't capture them
+        cassette = self.cassette
+        if cassette is not None and (headers or data is not None):
+            if cassette.mode == "replay":
+                raise LookupError(
+                    f"{cassette.path} can't replay a request with extra headers "
+                    "or a body"
+                )
+            cassette = None
+        if cassette is not None:
+            response = cassette.play(key, method, requested_uri, sorted_params)
+            if response is not None:
+                return response
+        extra_headers = headers
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(key)
+            if event is not None:
+                event["retries"] = attempt
+                start = perf_counter()
+            # Signed on every attempt so a retry never goes out with an
+            # expired x-WATimestamp
+            headers = signer.headers(requested_uri, sorted_params, method)
+            if extra_headers:
+                headers.update(extra_headers)
+            try:
+                if event is None:
+                    response = self.request(
+                        requested_uri,
+                        headers,
+                        query_params,
+                        method,
+                        stream=stream,
+                        data=data,
+                    )
+                else:
+                    _add(event["phases"], "sign", perf_counter() - start)
+                    response = self._timed_request(
+                        event,
+                        requested_uri,
+                        headers,
+                        query_params,
+                        method,
+                        stream,
+                        data,
+                    )
+            except (requests.ConnectionError, requests.Timeout):
+                if self.retry is None or not self.retry.is_retryable(method, attempt):
+                    raise
+                wait = self.retry.backoff(attempt)
+            else:
+                wait = None
+                if self.retry is not None and self.retry.is_retryable(
+                    method, attempt, response
+                ):
+                    wait = self.retry.backoff(attempt, response)
+                    if self.rate_limiter is not None and response.status_code == 429:
+                        # Everything sharing the budget waits as long as the
+                        # server asked, even when this request gives up
+                        pause = self.retry.retry_after(response)
+                        self.rate_limiter.pause(key, wait if pause is None else pause)
+                if wait is None:
+                    if cassette is not None:
+                        cassette.record(
+                            key, method, requested_uri, sorted_params, response
+                        )
+                    return response
+                response.close()
+            time.sleep(wait)
+            attempt += 1
+
+    def _timed_request(
+        self, event, requested_uri, headers, query_params, method, stream, data
+    ):
+        # Streamed so the headers arriving (time to first byte) and the body
+        # downloading are timed apart; urllib3 times new connections
+        phases = event["phases"]
+        _connects.seconds = 0
+        start = perf_counter()
+        response = self.request(
+            requested_uri, headers, query_params, method, stream=True, data=data
+        )
+        elapsed = perf_counter() - start
+        _add(phases, "connect", _connects.seconds)
+        _add(phases, "ttfb", elapsed - _connects.seconds)
+        event["status"] = response.status_code
+        if not stream:
+            start = perf_counter()
+            event["bytes"] = len(response.content)
+            _add(phases, "download", perf_counter() - start)
+        return response
+
+    def _revalidate(self, cache_key, *args):
+        with self._revalidating_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+
+        def refresh():
+            try:
+                self._fetch(cache_key, *args)
+            except Exception:
+                # The stale copy stays in place; the next request retries
+                pass
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(cache_key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def request(
+        self, requested_uri, headers, query_params, method, stream=False, data=None
+    ):
+        if self.closed:
+            raise RuntimeError("Cannot make a request with a closed Client")
+        return self.session.request(
+            method=method,
+            url=f"{self.base_url}{requested_uri}",
+            params=query_params,
+            headers=headers,
+            timeout=self.timeout,
+            stream=stream,
+            data=data,
+        )
+
+    def close(self):
+        """
+        Close every pooled connection.  The client can't be used afterwards.
+        """
+        if not self.closed:
+            self.session.close()
+            self.closed = True
+
+
+def _add(phases, phase, seconds):
+    # Retried requests add up the time spent in each phase
+    phases[phase] = phases.get(phase, 0) + seconds
+
+
+_connects = threading.local()
+
+
+def _timed(connection_cls):
+    class TimedConnection(connection_cls):
+        def connect(self):
+            start = perf_counter()
+            try:
+                return super().connect()
+            finally:
+                _connects.seconds = getattr(_connects, "seconds", 0) + (
+                    perf_counter() - start
+                )
+
+    return TimedConnection
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _timed(HTTPConnection)
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _timed(HTTPSConnection)
+
+
+class _TimedAdapter(HTTPAdapter):
+    """
+    Adapter whose connections record how long opening them (TCP and TLS)
+    took, for clients with metrics.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _request_key(signer, method, requested_uri, sorted_params):
+    # Identifies identical requests for caching and coalescing; the user is
+    # included since different advisors get different data back
+    return (
+        f"{signer.credentials.user_guid} {method} "
+        f"{requested_uri}?{sorted_params or ''}"
+    )
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the client shared by the functional API, creating one with the
+    default pool settings on first use.
+    """
+    global _default_client
+    if _default_client is None or _default_client.closed:
+        with _default_lock:
+            if _default_client is None or _default_client.closed:
+                _default_client = Client()
+    return _default_client
+
+
+def set_client(client):
+    """
+    Replace the client shared by the functional API.  The previous client is
+    returned (it is not closed) so callers can restore or close it.
+
+    Arguments
+    ---------
+    client: Client, required
+        Client to use for every subsequent functional API call
+    """
+    global _default_client
+    with _default_lock:
+        previous, _default_client = _default_client, client
+    return previous
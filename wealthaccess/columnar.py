@@ -0,0 +1,206 @@
+"""
+Columnar results: `output="dataframe"` or `output="arrow"` turn a response
+into a pandas DataFrame or pyarrow Table, converting date, numeric and
+boolean columns a whole column at a time.  `output="models"` returns a list
+of the endpoint's typed records (see `models`).
+"""
+import importlib
+
+
+OUTPUTS = ("response", "records", "dataframe", "arrow", "models")
+
+# Columns converted for each endpoint key.  Columns missing from a payload
+# are skipped, and any other column ending in "Date" is parsed as a date.
+SCHEMAS = {
+    "Accounts": {
+        "dates": ("openDate", "closeDate", "lastUpdated"),
+        "numerics": ("balance", "marketValue", "cashBalance"),
+        "booleans": ("isClosed", "isManual", "isOrion"),
+    },
+    "Holdings": {
+        "dates": ("asOfDate", "priceDate"),
+        "numerics": ("quantity", "price", "marketValue", "costBasis", "unitCost"),
+        "booleans": ("isCash",),
+    },
+    "Transactions": {
+        "dates": ("transactionDate", "settlementDate", "postedDate"),
+        "numerics": ("amount", "quantity", "price", "fee"),
+        "booleans": ("isTransfer", "isPending"),
+    },
+    "InvestorAccounts": {
+        "dates": ("openDate", "closeDate"),
+        "numerics": ("balance", "marketValue"),
+        "booleans": ("isClosed",),
+    },
+}
+SCHEMAS["AdvisorInvestorHoldings"] = SCHEMAS["Holdings"]
+SCHEMAS["AdvisorInvestorDiversificationHoldings"] = SCHEMAS["Holdings"]
+SCHEMAS["AdvisorInvestorTransactions"] = SCHEMAS["Transactions"]
+SCHEMAS["AdvisorInvestorBankTransactions"] = SCHEMAS["Transactions"]
+SCHEMAS["AdvisorInvestorBrokerageTransactions"] = SCHEMAS["Transactions"]
+SCHEMAS["InvestorAccountTransactions"] = SCHEMAS["Transactions"]
+
+_BOOLEANS = {
+    True: True,
+    False: False,
+    "true": True,
+    "false": False,
+    "True": True,
+    "False": False,
+}
+
+_EXTRAS = {"pandas": "dataframe", "pyarrow": "arrow"}
+
+
+def _import(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError(
+            f"output={_EXTRAS[name]!r} requires {name}: "
+            f"pip install wealthaccess[{name}]"
+        ) from None
+
+
+def _columns(records):
+    # Union of every record's keys, in the order they're first seen
+    names = {}
+    for record in records:
+        for name in record:
+            names[name] = None
+    return {name: [record.get(name) for record in records] for name in names}
+
+
+def _schema(key, columns):
+    schema = SCHEMAS.get(key, {})
+    dates = set(schema.get("dates", ())) | {
+        name for name in columns if name.endswith("Date")
+    }
+    return (
+        dates & columns.keys(),
+        set(schema.get("numerics", ())) & columns.keys(),
+        set(schema.get("booleans", ())) & columns.keys(),
+    )
+
+
+def to_dataframe(records, key=None):
+    """
+    Build a pandas DataFrame from a list of records, converting the date,
+    numeric and boolean columns in the endpoint key's schema.
+
+    Arguments
+    ---------
+    records: list of dict, required
+
+    Keyword Arguments
+    -----------------
+    key: str, default None, optional
+        Endpoint key the records came from, e.g. "Holdings"
+    """
+    pd = _import("pandas")
+    columns = _columns(records)
+    dates, numerics, booleans = _schema(key, columns)
+    data = {}
+    for name, values in columns.items():
+        if name in dates:
+            # Without a format, pandas takes the first value's and turns
+            # every value in another (e.g. a date among datetimes) into NaT
+            data[name] = pd.to_datetime(
+                pd.Series(values), errors="coerce", format="ISO8601"
+            )
+        elif name in numerics:
+            data[name] = pd.to_numeric(pd.Series(values), errors="coerce")
+        elif name in booleans:
+            data[name] = pd.Series(values).map(_BOOLEANS).astype("boolean")
+        else:
+            data[name] = values
+    return pd.DataFrame(data)
+
+
+def _cast(pa, pc, array, target):
+    try:
+        return pc.cast(array, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass
+    # One value at a time, so values that don't convert are null rather
+    # than the whole column staying strings, as with pandas' errors="coerce"
+    values = []
+    for value in array:
+        try:
+            values.append(pc.cast(value, target).as_py())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            values.append(None)
+    return pa.array(values, target)
+
+
+def to_arrow(records, key=None):
+    """
+    Build a pyarrow Table from a list of records, converting the date,
+    numeric and boolean columns in the endpoint key's schema.  Values that
+    can't be converted are null, as they are in `to_dataframe`.
+
+    Arguments
+    ---------
+    records: list of dict, required
+
+    Keyword Arguments
+    -----------------
+    key: str, default None, optional
+        Endpoint key the records came from, e.g. "Holdings"
+    """
+    pa = _import("pyarrow")
+    pc = importlib.import_module("pyarrow.compute")
+    columns = _columns(records)
+    dates, numerics, booleans = _schema(key, columns)
+    arrays = {}
+    for name, values in columns.items():
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array([None if v is None else str(v) for v in values])
+        if name in dates:
+            target = pa.timestamp("us")
+        elif name in numerics:
+            target = pa.float64()
+        elif name in booleans:
+            target = pa.bool_()
+        else:
+            target = None
+        if target is not None and array.type != target:
+            array = _cast(pa, pc, array, target)
+        arrays[name] = array
+    return pa.table(arrays)
+
+
+def convert(response, key, output):
+    """
+    Returns the response in the requested output: the response itself,
+    its decoded records, a DataFrame, an Arrow Table or a list of models.
+    """
+    if output in (None, "response"):
+        return response
+    if output not in OUTPUTS:
+        raise ValueError(f"output must be one of {', '.join(OUTPUTS)}")
+    response.raise_for_status()
+    return convert_records(response.json(), key, output)
+
+
+def convert_records(records, key, output):
+    """
+    Returns decoded records in the requested output, for results that are
+    put together from several responses.  Any output but "response".
+    """
+    if output not in OUTPUTS or output == "response":
+        choices = ", ".join(o for o in OUTPUTS if o != "response")
+        raise ValueError(f"output must be one of {choices}")
+    if output == "records":
+        return records
+    if isinstance(records, dict):
+        records = [records]
+    if output == "models":
+        from .models import model_for
+
+        return model_for(key).from_records(records)
+    if output == "dataframe":
+        return to_dataframe(records, key)
+    return to_arrow(records, key)
@@ -0,0 +1,422 @@
+import json
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from .client import BASE_URL, Client, set_client
+from .private import get_data
+from .throttle import RateLimiter
+
+# Status of a unit of work in the queue
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def _execute(kind, params, fields, kwargs, client=None):
+    """
+    Fetch one unit and return its decoded JSON and the units it expands to.
+    Module-level so process pools can pickle it.
+    """
+    client_field, account_field = fields
+    if kind == "firm":
+        key, query_params = "FirmInvestors", params
+    elif kind == "client":
+        key, query_params = "InvestorAccounts", params
+    else:
+        key, query_params = "InvestorAccountTransactions", dict(kwargs, **params)
+    data = get_data(
+        key, "GET", query_params=dict(query_params, output="records"), client=client
+    )
+    if kind == "firm":
+        children = [("client", {"clientIdentifier": c[client_field]}) for c in data]
+    elif kind == "client":
+        children = [
+            ("account", dict(params, accountNumber=a[account_field])) for a in data
+        ]
+    else:
+        children = []
+    return data, children
+
+
+def _process_settings(client, max_workers):
+    """
+    Returns what each process's client is built from: the client's
+    base_url, credentials, timeout and retry, and its rate limits split
+    evenly between the processes.
+    """
+    if client is None:
+        return {"base_url": BASE_URL}
+    settings = {
+        "base_url": client.base_url,
+        "credentials": client.credentials,
+        "timeout": client.timeout,
+        "retry": client.retry,
+    }
+    limiter = client.rate_limiter
+    if limiter is not None:
+
+        def share(bucket):
+            return (bucket.rate / max_workers, max(bucket.burst / max_workers, 1))
+
+        settings["rate_limits"] = (
+            share(limiter.bucket) if limiter.bucket is not None else (None, None),
+            {key: share(bucket) for key, bucket in limiter.endpoints.items()},
+        )
+    return settings
+
+
+def _init_process(settings):
+    settings = dict(settings)
+    if "rate_limits" in settings:
+        (rate, burst), per_endpoint = settings.pop("rate_limits")
+        settings["rate_limiter"] = RateLimiter(rate, burst, per_endpoint)
+    set_client(Client(**settings))
+
+
+class FirmCrawl:
+    """
+    Resumable crawl of every client's accounts and account transactions
+    under a firm.
+
+    The firm → client → account tree is expanded into a work queue kept in a
+    SQLite database.  A unit's result, the units it expands to and it being
+    marked done are written in one database transaction, so a crawl that
+    stops (or crashes) picks up where it left off the next time it's run.
+
+    Units are keyed on the query parameters passed to `run` as well, so
+    crawls of the same firm with different parameters (e.g. date ranges)
+    don't share units.  A failed unit waits retry_delay seconds, doubling
+    with every attempt, before it's tried again.
+
+    Only one crawl should run against a database at a time.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file.  It's created when it doesn't exist.
+    firm: str, required
+        Guid that uniquely identifies a firm
+
+    Keyword Arguments
+    -----------------
+    client: Client, default None, optional
+        Client used by the threads.  Processes each open their own client
+        with its base_url, credentials, timeout and retry, and an even
+        share of its rate limits; its cache, metrics, cassette and
+        coalescing only apply to threads.
+    client_field: str, default "clientIdentifier", optional
+        Field holding each firm client's identifier
+    account_field: str, default "accountNumber", optional
+        Field holding each account's number
+    max_attempts: int, default 3, optional
+        Times a unit is tried before it's marked failed
+    retry_delay: float, default 1, optional
+        Seconds before a failed unit's first retry
+    """
+
+    def __init__(
+        self,
+        path,
+        firm,
+        client=None,
+        client_field="clientIdentifier",
+        account_field="accountNumber",
+        max_attempts=3,
+        retry_delay=1,
+    ):
+        self.path = path
+        self.firm = firm
+        self.client = client
+        self.fields = (client_field, account_field)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS units (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    not_before REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    records INTEGER,
+                    updated_at REAL NOT NULL,
+                    UNIQUE (kind, params, options)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS units_status "
+                "ON units (options, status, id)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    unit_id INTEGER PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _add(self, conn, units, options):
+        now = time.time()
+        conn.executemany(
+            "INSERT OR IGNORE INTO units "
+            "(kind, params, options, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (kind, json.dumps(params, sort_keys=True), options, PENDING, now)
+                for kind, params in units
+            ],
+        )
+
+    def _claim(self, conn, limit, options):
+        rows = conn.execute(
+            "SELECT id, kind, params FROM units "
+            "WHERE options = ? AND status = ? AND not_before <= ? "
+            "ORDER BY id LIMIT ?",
+            (options, PENDING, time.time(), limit),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE units SET status = ?, updated_at = ? WHERE id = ?",
+            [(RUNNING, time.time(), row[0]) for row in rows],
+        )
+        return [(unit_id, kind, json.loads(params)) for unit_id, kind, params in rows]
+
+    def _waiting(self, conn, options):
+        """
+        Returns when the next unit waiting to be retried can be claimed, or
+        None when none are waiting.
+        """
+        return conn.execute(
+            "SELECT MIN(not_before) FROM units "
+            "WHERE options = ? AND status = ? AND not_before > ?",
+            (options, PENDING, time.time()),
+        ).fetchone()[0]
+
+    def _complete(self, conn, unit_id, data, children, options):
+        conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?)", (unit_id, json.dumps(data))
+        )
+        self._add(conn, children, options)
+        conn.execute(
+            "UPDATE units SET status = ?, error = NULL, records = ?, updated_at = ? "
+            "WHERE id = ?",
+            (DONE, len(data) if isinstance(data, list) else 1, time.time(), unit_id),
+        )
+
+    def _fail(self, conn, unit_id, error):
+        now = time.time()
+        conn.execute(
+            "UPDATE units SET attempts = attempts + 1, error = ?, updated_at = ?, "
+            "not_before = ? + ? * (1 << attempts), "
+            "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END WHERE id = ?",
+            (
+                repr(error),
+                now,
+                now,
+                self.retry_delay,
+                self.max_attempts,
+                FAILED,
+                PENDING,
+                unit_id,
+            ),
+        )
+
+    def run(
+        self,
+        max_workers=8,
+        processes=False,
+        on_progress=None,
+        report_every=10,
+        **kwargs,
+    ):
+        """
+        Work through the queue until every unit is done or failed, and
+        return the final progress report.
+
+        Keyword Arguments
+        -----------------
+        max_workers: int, default 8, optional
+            Number of threads (or processes) making requests
+        processes: bool, default False, optional
+            Use a process pool instead of a thread pool, for crawls where
+            decoding responses keeps one process busy
+        on_progress: callable, default None, optional
+            Called with a progress report (see `progress`) every
+            report_every seconds and once the crawl finishes
+        report_every: float, default 10, optional
+            Seconds between progress reports
+        Any other keyword argument is passed to the account transactions
+        endpoint, e.g. startDate and endDate, and is part of every unit's
+        key
+        """
+        options = json.dumps(kwargs, sort_keys=True, default=str)
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_process,
+                initargs=(_process_settings(self.client, max_workers),),
+            )
+            client = None
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            client = self.client
+        # Units left running by a crawl that stopped are picked up again
+        with self._connect() as conn:
+            self._add(conn, [("firm", {"firm": self.firm})], options)
+            conn.execute(
+                "UPDATE units SET status = ? WHERE status = ?", (PENDING, RUNNING)
+            )
+        started = last_report = time.monotonic()
+        done = records = 0
+        pending = {}
+        try:
+            while True:
+                with self._connect() as conn:
+                    claimed = self._claim(conn, max_workers * 2 - len(pending), options)
+                    waiting = self._waiting(conn, options)
+                for unit_id, kind, params in claimed:
+                    future = executor.submit(
+                        _execute, kind, params, self.fields, kwargs, client
+                    )
+                    pending[future] = unit_id
+                timeout = report_every
+                if waiting is not None:
+                    # Wake up when the next failed unit can be retried
+                    timeout = min(timeout, max(waiting - time.time(), 0.01))
+                if pending:
+                    finished, _ = wait(
+                        pending, timeout=timeout, return_when=FIRST_COMPLETED
+                    )
+                elif waiting is None:
+                    break
+                else:
+                    time.sleep(timeout)
+                    finished = ()
+                with self._connect() as conn:
+                    for future in finished:
+                        unit_id = pending.pop(future)
+                        try:
+                            data, children = future.result()
+                        except Exception as e:
+                            self._fail(conn, unit_id, e)
+                            continue
+                        self._complete(conn, unit_id, data, children, options)
+                        done += 1
+                        records += len(data) if isinstance(data, list) else 1
+                now = time.monotonic()
+                if on_progress is not None and now - last_report >= report_every:
+                    on_progress(self.progress(done, records, now - started))
+                    last_report = now
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        report = self.progress(done, records, time.monotonic() - started)
+        if on_progress is not None:
+            on_progress(report)
+        return report
+
+    def progress(self, done=0, records=0, elapsed=0):
+        """
+        Returns the number of units in each status, by kind, along with how
+        many units and records the current run has done and how fast.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, status, COUNT(*), COALESCE(SUM(records), 0) "
+                "FROM units GROUP BY kind, status"
+            ).fetchall()
+        units = {}
+        for kind, status, count, _ in rows:
+            units.setdefault(kind, {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0})
+            units[kind][status] = count
+        return {
+            "units": units,
+            "records": sum(row[3] for row in rows),
+            "run": {
+                "elapsed": elapsed,
+                "units": done,
+                "records": records,
+                "units_per_second": done / elapsed if elapsed else 0,
+                "records_per_second": records / elapsed if elapsed else 0,
+            },
+        }
+
+    def results(self, kind="account"):
+        """
+        Yields `(params, data)` for every finished unit of a kind: "firm",
+        "client" or "account".  An account's data is its transactions.  A
+        unit's params include the query parameters it was crawled with.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT units.params, units.options, results.data FROM units "
+                "JOIN results ON results.unit_id = units.id "
+                "WHERE units.kind = ? ORDER BY units.id",
+                (kind,),
+            )
+            for params, options, data in cursor:
+                yield dict(json.loads(options), **json.loads(params)), json.loads(data)
+
+    def failures(self):
+        """
+        Yields `(kind, params, error)` for every unit that ran out of
+        attempts.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT kind, params, options, error FROM units "
+                "WHERE status = ? ORDER BY id",
+                (FAILED,),
+            )
+            for kind, params, options, error in cursor:
+                yield kind, dict(json.loads(options), **json.loads(params)), error
+
+    def retry_failed(self):
+        """
+        Put every failed unit back in the queue with its attempts reset.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE units SET status = ?, attempts = 0, not_before = 0 "
+                "WHERE status = ?",
+                (PENDING, FAILED),
+            )
+
+
+def crawl_firm(path, firm, max_workers=8, processes=False, **kwargs):
+    """
+    Crawl, or resume crawling, every client's accounts and account
+    transactions under a firm into the SQLite database at path, and return
+    the final progress report.  See `FirmCrawl`.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file
+    firm: str, required
+        Guid that uniquely identifies a firm
+
+    Keyword Arguments
+    -----------------
+    Passed through to `FirmCrawl.run`
+    """
+    return FirmCrawl(path, firm).run(
+        max_workers=max_workers, processes=processes, **kwargs
+    )
@@ -0,0 +1,511 @@
+import mimetypes
+import os
+import re
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .bulk import _KEY_NAMES, _get_investor_ids, map_unordered
+from .client import get_client
+from .private import get_data
+
+# Fields holding a vault entry's id, name and whether it's a folder
+DOCUMENT_FIELDS = ("vaultFileId", "name", "isFolder")
+
+_CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-\d+|\*)/(\d+|\*)")
+
+
+def _content_range(response):
+    # (first byte, total size) from a Content-Range header, None if unknown
+    match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if match is None:
+        return None, None
+    start, total = match.groups()
+    return (
+        int(start) if start is not None else None,
+        int(total) if total != "*" else None,
+    )
+
+
+def _restart(f):
+    f.seek(0)
+    f.truncate()
+
+
+def _download(f, offset, request, chunk_size, max_resumes, expected_size):
+    total = expected_size
+    resumes = 0
+    while True:
+        response = request(offset)
+        try:
+            if response.status_code == 416 and offset:
+                # Nothing left past the offset: the file is already complete,
+                # unless the document changed since the partial download
+                _, size = _content_range(response)
+                if size == offset:
+                    total = size
+                    break
+                _restart(f)
+                offset = 0
+                continue
+            response.raise_for_status()
+            start, size = _content_range(response)
+            if response.status_code != 206 or start != offset:
+                # The whole document was sent, so drop what's already written
+                if offset:
+                    _restart(f)
+                    offset = 0
+                length = response.headers.get("Content-Length")
+                size = int(length) if length else None
+            if size is not None:
+                total = size
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                offset += len(chunk)
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            if resumes >= max_resumes:
+                raise
+            resumes += 1
+            continue
+        finally:
+            response.close()
+        break
+    f.flush()
+    if total is not None and offset != total:
+        raise IOError(f"Downloaded {offset} bytes of a {total} byte document")
+    return offset
+
+
+def download_investor_document(
+    investor_id,
+    vault_file_id,
+    destination,
+    chunk_size=1 << 20,
+    resume=True,
+    max_resumes=3,
+    expected_size=None,
+    client=None,
+    signer=None,
+    **kwargs,
+):
+    """
+    Download a document from the document detail endpoint to a file,
+    streaming it in chunks so only one chunk is held in memory, and return
+    its size in bytes.
+
+    A path is written to `<destination>.part` first and renamed once the
+    size is verified.  With resume, an existing part file is continued with
+    a Range request instead of downloaded again, and a connection that
+    drops mid-download is resumed from the last byte written.
+
+    Arguments
+    ---------
+    investor_id: int, required
+        Investor specified by the investorId returned from the investors
+        endpoint.
+    vault_file_id: int, required
+        Document specified by its vaultFileId
+    destination: str, path or file-like, required
+        Path to write the document to, or a binary file object.  A file
+        object has to be seekable for a download to be restarted.
+    chunk_size: int, default 1 MiB, optional
+        Bytes read from the connection at a time
+    resume: bool, default True, optional
+        Continue an existing part file
+    max_resumes: int, default 3, optional
+        Times a dropped connection is resumed before giving up
+    expected_size: int, default None, optional
+        Size to verify against when the response doesn't give one
+
+    Keyword Arguments
+    -----------------
+    IsPreview: bool, default None, optional
+    AdvisorId: int, default None, optional
+    """
+    client = client or get_client()
+
+    def request(offset):
+        # Identity encoding keeps Range offsets and sizes in file bytes
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        return get_data(
+            "AdvisorInvestorDocumentsDetail",
+            "GET",
+            uri_params={"investor_id": investor_id, "vault_file_id": vault_file_id},
+            query_params=kwargs,
+            client=client,
+            stream=True,
+            signer=signer,
+            headers=headers,
+        )
+
+    if not isinstance(destination, (str, os.PathLike)):
+        return _download(
+            destination, 0, request, chunk_size, max_resumes, expected_size
+        )
+    part = f"{os.fspath(destination)}.part"
+    offset = os.path.getsize(part) if resume and os.path.exists(part) else 0
+    with open(part, "r+b" if offset else "wb") as f:
+        f.seek(offset)
+        size = _download(f, offset, request, chunk_size, max_resumes, expected_size)
+    os.replace(part, destination)
+    return size
+
+
+def download_investor_documents(
+    documents, directory, max_workers=8, client=None, signer=None, **kwargs
+):
+    """
+    Download many documents on a bounded thread pool, yielding
+    `(investor_id, vault_file_id, result)` as each finishes.  The result is
+    the document's size, or the exception raised when it failed; a failed
+    download's part file is kept, so running the batch again resumes it.
+
+    Each document is written to `<directory>/<investor_id>/<filename>`.
+
+    Arguments
+    ---------
+    documents: iterable, required
+        `(investor_id, vault_file_id)` or
+        `(investor_id, vault_file_id, filename)` tuples.  The filename
+        defaults to the vault_file_id.
+    directory: str, required
+        Directory to download into
+    max_workers: int, default 8, optional
+        Maximum number of downloads running at once
+
+    Keyword Arguments
+    -----------------
+    Passed through to `download_investor_document`
+    """
+    client = client or get_client()
+
+    def download(document):
+        investor_id, vault_file_id, *filename = document
+        folder = os.path.join(directory, str(investor_id))
+        os.makedirs(folder, exist_ok=True)
+        name = filename[0] if filename else vault_file_id
+        destination = os.path.join(folder, str(name))
+        return download_investor_document(
+            investor_id,
+            vault_file_id,
+            destination,
+            client=client,
+            signer=signer,
+            **kwargs,
+        )
+
+    for document, result in map_unordered(download, documents, max_workers):
+        yield document[0], document[1], result
+
+
+class MultipartFile:
+    """
+    multipart/form-data body holding one file, read and sent a chunk at a
+    time so only one chunk is in memory.  The body's length is given when
+    the file's size is known (a path or seekable file object); otherwise
+    it's sent with chunked transfer encoding.
+
+    Iterating the body again starts the file over, so a request can be
+    retried unless the source is an unseekable file object.
+
+    Arguments
+    ---------
+    source: str, path or file-like, required
+        Path to the file, or a binary file object positioned at the start
+        of the data to send
+    filename: str, default the source's file name, optional
+        Name the file is uploaded as
+    field: str, default "file", optional
+        Name of the form field holding the file
+    content_type: str, default guessed from the filename, optional
+    chunk_size: int, default 1 MiB, optional
+        Bytes read from the file at a time
+    """
+
+    def __init__(
+        self, source, filename=None, field="file", content_type=None, chunk_size=1 << 20
+    ):
+        self.source = source
+        self.is_path = isinstance(source, (str, os.PathLike))
+        if filename is None:
+            name = os.fspath(source) if self.is_path else getattr(source, "name", "")
+            filename = os.path.basename(str(name)) or "document"
+        content_type = (
+            content_type
+            or mimetypes.guess_type(filename)[0]
+            or "application/octet-stream"
+        )
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        quoted = filename.replace('"', "%22")
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{quoted}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._start = None
+        size = self._size()
+        if size is not None:
+            # requests sends a Content-Length for bodies with a len attribute
+            self.len = len(self._head) + size + len(self._tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _size(self):
+        if self.is_path:
+            return os.path.getsize(self.source)
+        try:
+            self._start = self.source.tell()
+            end = self.source.seek(0, os.SEEK_END)
+            self.source.seek(self._start)
+        except (AttributeError, OSError):
+            self._start = None
+            return None
+        return end - self._start
+
+    def __iter__(self):
+        yield self._head
+        if self.is_path:
+            f = open(self.source, "rb")
+        else:
+            f = self.source
+            if self._start is not None:
+                f.seek(self._start)
+        try:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                yield chunk
+        finally:
+            if self.is_path:
+                f.close()
+        yield self._tail
+
+
+def upload_investor_document(
+    investor_id,
+    source,
+    filename=None,
+    field="file",
+    content_type=None,
+    chunk_size=1 << 20,
+    client=None,
+    signer=None,
+    **kwargs,
+):
+    """
+    Upload a file to an investor's documents as a streamed multipart body,
+    so only one chunk of it is held in memory.  The request is signed with
+    its query parameters like every other request.
+
+    Arguments
+    ---------
+    investor_id: int, required
+        Investor specified by the investorId returned from the investors
+        endpoint.
+    source: str, path or file-like, required
+        Path to the file, or a binary file object
+    filename, field, content_type, chunk_size: optional
+        See `MultipartFile`
+
+    Keyword Arguments
+    -----------------
+    request: str, default None, optional
+        Passed to the endpoint as the request query parameter
+    """
+    body = MultipartFile(source, filename, field, content_type, chunk_size)
+    return get_data(
+        "AdvisorInvestorDocumentPost",
+        "POST",
+        uri_params={"investor_id": investor_id},
+        query_params=dict(kwargs, investorId=investor_id),
+        client=client,
+        signer=signer,
+        headers={"Content-Type": body.content_type},
+        data=body,
+    )
+
+
+def upload_investor_documents(
+    uploads, max_workers=8, client=None, signer=None, **kwargs
+):
+    """
+    Upload many files on a bounded thread pool, yielding
+    `(investor_id, source, result)` as each finishes.  The result is the
+    response, or the exception raised (including the `requests.HTTPError`
+    for a non-2xx response) when the upload failed.
+
+    Arguments
+    ---------
+    uploads: iterable, required
+        `(investor_id, source)` or `(investor_id, source, filename)` tuples
+    max_workers: int, default 8, optional
+        Maximum number of uploads running at once
+
+    Keyword Arguments
+    -----------------
+    Passed through to `upload_investor_document`
+    """
+    client = client or get_client()
+
+    def upload(item):
+        investor_id, source, *filename = item
+        response = upload_investor_document(
+            investor_id,
+            source,
+            filename[0] if filename else None,
+            client=client,
+            signer=signer,
+            **kwargs,
+        )
+        # Other outputs have already raised for a non-2xx response
+        if isinstance(response, requests.Response):
+            response.raise_for_status()
+        return response
+
+    for item, result in map_unordered(upload, uploads, max_workers):
+        yield item[0], item[1], result
+
+
+def _walk(investor_ids, max_workers, folders, fields, client, signer, kwargs):
+    id_field, name_field, folder_field = fields
+    client = client or get_client()
+    # Searching every listing would prune folders whose own names don't
+    # match before their contents are seen, so names are matched here
+    kwargs = dict(kwargs)
+    search = kwargs.pop("searchTerm", None)
+    search = str(search).lower() if search else None
+
+    def list_folder(investor_id, parent_id):
+        query_params = dict(kwargs)
+        if parent_id is not None:
+            query_params["parentId"] = parent_id
+        response = get_data(
+            "AdvisorInvestorDocumentsList",
+            "GET",
+            uri_params={"investor_id": investor_id},
+            query_params=query_params,
+            client=client,
+            signer=signer,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    # Folders waiting to be listed, oldest first, as (investor_id, id, path)
+    queue = deque((investor_id, None, "") for investor_id in investor_ids)
+    seen = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        while queue or pending:
+            while queue and len(pending) < max_workers * 2:
+                folder = queue.popleft()
+                pending[executor.submit(list_folder, *folder[:2])] = folder
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                investor_id, _, path = pending.pop(future)
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    yield investor_id, path or "/", e
+                    continue
+                for entry in entries:
+                    entry_path = f"{path}/{entry.get(name_field, entry.get(id_field))}"
+                    if entry.get(folder_field):
+                        # A folder showing up twice is only listed once
+                        if (investor_id, entry[id_field]) not in seen:
+                            seen.add((investor_id, entry[id_field]))
+                            queue.append((investor_id, entry[id_field], entry_path))
+                        if not folders:
+                            continue
+                    name = str(entry.get(name_field, ""))
+                    if search is None or search in name.lower():
+                        yield investor_id, entry_path, entry
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def walk_investor_documents(
+    investor_id,
+    max_workers=8,
+    folders=False,
+    fields=DOCUMENT_FIELDS,
+    client=None,
+    signer=None,
+    **kwargs,
+):
+    """
+    Walk an investor's whole document vault, listing folders breadth-first
+    on a bounded thread pool and yielding `(path, metadata)` for each entry
+    as soon as its folder has been listed.  Paths are the entries' names
+    joined with "/", e.g. "/Statements/2020/June.pdf".
+
+    Arguments
+    ---------
+    investor_id: int, required
+        Investor specified by the investorId returned from the investors
+        endpoint.
+    max_workers: int, default 8, optional
+        Maximum number of folders listed at once
+    folders: bool, default False, optional
+        Yield the folders too, not only the files
+    fields: tuple, default DOCUMENT_FIELDS, optional
+        Fields holding an entry's id, name and whether it's a folder
+
+    Keyword Arguments
+    -----------------
+    searchTerm: str, default None, optional
+        Only yield entries whose names contain it, ignoring case.  Every
+        folder is still walked, whatever its name.
+    """
+    for _, path, entry in _walk(
+        [investor_id], max_workers, folders, fields, client, signer, kwargs
+    ):
+        if isinstance(entry, Exception):
+            raise entry
+        yield path, entry
+
+
+def walk_all_investor_documents(
+    investor_ids=None,
+    max_workers=16,
+    folders=False,
+    fields=DOCUMENT_FIELDS,
+    client=None,
+    signer=None,
+    **kwargs,
+):
+    """
+    Walk many investors' document vaults at once on one bounded thread pool,
+    yielding `(investor_id, path, metadata)` for each entry as it's found.
+    A folder that can't be listed doesn't stop the walk: it's yielded with
+    the exception raised as its metadata.
+
+    Arguments
+    ---------
+    investor_ids: iterable, default None, optional
+        Investors to walk.  Every investor returned by the investors
+        endpoint is used when not given.
+    max_workers: int, default 16, optional
+        Maximum number of folders listed at once
+    folders, fields: optional
+        See `walk_investor_documents`
+
+    Keyword Arguments
+    -----------------
+    searchTerm: str, default None, optional
+        Only yield entries whose names contain it, ignoring case.  Every
+        folder is still walked, whatever its name.
+    """
+    if investor_ids is None:
+        keys = {k: kwargs[k] for k in _KEY_NAMES if k in kwargs}
+        investor_ids = _get_investor_ids(keys, client)
+    return _walk(investor_ids, max_workers, folders, fields, client, signer, kwargs)
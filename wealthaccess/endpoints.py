@@ -0,0 +1,146 @@
+from datetime import date, datetime
+from string import Formatter
+
+
+def serialize(value):
+    """
+    Format a query parameter value the way Wealth Access expects it, which
+    is also the form that goes into the signature.
+    """
+    if value is True or value is False:
+        return "true" if value else "false"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class Endpoint:
+    """
+    A Wealth Access route: its URI template, parsed once, and the query
+    parameters it accepts.
+
+    Arguments
+    ---------
+    key: str, required
+        Name used to refer to the endpoint, e.g. "Investors"
+    hierarchy: str, required
+        "ADVISOR", "INVESTOR" or "FIRM"
+    uri: str, required
+        URI template, e.g. "/api/v2/advisor/investors/{investor_id}/holdings"
+    params: iterable, default (), optional
+        Names of the query parameters the endpoint accepts
+    """
+
+    __slots__ = ("key", "hierarchy", "uri", "params", "uri_fields", "_parts")
+
+    def __init__(self, key, hierarchy, uri, params=()):
+        self.key = key
+        self.hierarchy = hierarchy
+        self.uri = uri
+        self.params = frozenset(params)
+        self._parts = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(uri)
+        ]
+        self.uri_fields = tuple(field for _, field in self._parts if field)
+
+    def __repr__(self):
+        return f"Endpoint({self.key!r}, {self.uri!r})"
+
+    def requested_uri(self, uri_params=None):
+        if not self.uri_fields:
+            return self.uri
+        return "".join(
+            literal + (str(uri_params[field]) if field else "")
+            for literal, field in self._parts
+        )
+
+    def query(self, query_params):
+        """
+        Returns the accepted query parameters, serialized, and the sorted
+        query string they're signed with.  Unknown parameters and None
+        values are dropped.
+        """
+        params = {
+            k: serialize(v)
+            for k, v in query_params.items()
+            if k in self.params and v is not None
+        }
+        if not params:
+            return {}, ""
+        return params, "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def _endpoints(hierarchy, config):
+    return {
+        key: Endpoint(key, hierarchy, uri, params)
+        for key, (uri, params) in config.items()
+    }
+
+
+ENDPOINTS = {
+    **_endpoints(
+        "ADVISOR",
+        {
+            "Investors": ("/api/v2/advisor/investors", ()),
+            "Transactions": (
+                "/api/v2/advisor/transactions",
+                ("startDate", "endDate", "transactionId", "ignoreOrion"),
+            ),
+            "Diversifications": ("/api/v2/Advisor/Diversifications", ()),
+            "AdvisorInvestorProfile": (
+                "/api/v2/advisor/investors/{investor_id}/profile",
+                (),
+            ),
+            "AdvisorInvestorDocumentsList": (
+                "/api/v2/advisor/investors/{investor_id}/documents",
+                ("parentId", "searchTerm"),
+            ),
+            "AdvisorInvestorDocumentsDetail": (
+                "/api/v2/advisor/investors/{investor_id}/documents/{vault_file_id}",
+                ("IsPreview", "AdvisorId", "vaultFileId"),
+            ),
+            "AdvisorInvestorDocumentPost": (
+                "/api/v2/advisor/investors/{investor_id}/documents",
+                ("request", "investorId"),
+            ),
+            "AdvisorInvestorTransactions": (
+                "/api/v2/advisor/investors/{investor_id}/transactions",
+                ("startDate", "endDate", "ignoreOrion"),
+            ),
+            "AdvisorInvestorBankTransactions": (
+                "/api/v2/advisor/investors/{investor_id}/banktransactions",
+                ("hideTransfers", "startDate", "endDate", "ignoreOrion"),
+            ),
+            "AdvisorInvestorBrokerageTransactions": (
+                "/api/v2/advisor/investors/{investor_id}/brokeragetransactions",
+                ("hideTransfers", "startDate", "endDate", "ignoreOrion"),
+            ),
+            "AdvisorInvestorHoldings": (
+                "/api/v2/advisor/investors/{investor_id}/holdings",
+                ("ignoreOrion",),
+            ),
+            "AdvisorInvestorDiversificationHoldings": (
+                "/api/v2/advisor/investors/{investor_id}/diversificationholdings",
+                ("diversificationId", "categoryId", "ignoreOrion"),
+            ),
+            "Classifications": ("/api/v2/Advisor/Classifications", ()),
+            "Accounts": ("/api/v2/advisor/accounts", ("ignoreOrion",)),
+            "Holdings": ("/api/v2/advisor/holdings", ("ignoreOrion",)),
+        },
+    ),
+    **_endpoints(
+        "INVESTOR",
+        {
+            "InvestorAccountTransactions": (
+                "/api/v2/investor/accounts/transactions",
+                ("clientIdentifier", "accountNumber", "startDate", "endDate"),
+            ),
+            "InvestorAccounts": ("/api/v2/investor/accounts", ("clientIdentifier",)),
+            "InvestorProfile": ("/api/v2/investor/profile", ("clientIdentifier",)),
+        },
+    ),
+    **_endpoints(
+        "FIRM",
+        {"FirmInvestors": ("/api/v2/firm/investors", ("firm",))},
+    ),
+}
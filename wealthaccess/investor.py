@@ -155,7 +155,7 @@ def get_investor_document_detail(
     vaultFileId: str, default None, optional
     """
     return get_data(
-        key='AdvisorInvestorDocumentsList',
+        key='AdvisorInvestorDocumentsDetail',
         method='GET',
         uri_params={
             'investor_id': investor_id,
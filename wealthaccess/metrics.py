@@ -0,0 +1,194 @@
+"""
+Per-endpoint request instrumentation.
+
+Pass a `Metrics` to a Client to record, by endpoint key, how long each phase
+of a request takes (building params, signing, connecting, time to first
+byte, downloading and decoding), response sizes, status codes, retries and
+errors.  `render()` exports everything in the Prometheus text format, and
+hooks receive one event per request.  A client without metrics skips all
+of it.
+"""
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+
+PHASES = ("build", "sign", "connect", "ttfb", "download", "decode")
+
+SECONDS_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+BYTES_BUCKETS = tuple(2 ** n for n in range(8, 31, 2))
+
+
+class Histogram:
+    """
+    Counts of observed values falling under each bucket's upper bound.
+
+    Arguments
+    ---------
+    buckets: iterable, required
+        Upper bounds of the buckets
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Yields `(upper_bound, count)` with counts including every lower
+        bucket, ending with the "+Inf" bucket.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    """
+    Registry of request metrics, labelled by endpoint key.
+
+    Keyword Arguments
+    -----------------
+    seconds_buckets: iterable, default SECONDS_BUCKETS, optional
+        Bucket upper bounds for the phase timings
+    bytes_buckets: iterable, default BYTES_BUCKETS, optional
+        Bucket upper bounds for the response sizes
+    """
+
+    def __init__(self, seconds_buckets=SECONDS_BUCKETS, bytes_buckets=BYTES_BUCKETS):
+        self.seconds_buckets = seconds_buckets
+        self.bytes_buckets = bytes_buckets
+        self.phases = {}
+        self.sizes = {}
+        self.requests = Counter()
+        self.retries = Counter()
+        self.errors = Counter()
+        self.cache_hits = Counter()
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """
+        Call hook with an event dict after every request.  The event has the
+        endpoint key, method, status, bytes, retries, cached, error and a
+        phases dict of seconds spent in each phase.
+        """
+        self.hooks.append(hook)
+
+    def observe(self, key, phase, seconds):
+        with self._lock:
+            self._observe(key, phase, seconds)
+
+    def _observe(self, key, phase, seconds):
+        histogram = self.phases.get((key, phase))
+        if histogram is None:
+            histogram = self.phases[(key, phase)] = Histogram(self.seconds_buckets)
+        histogram.observe(seconds)
+
+    def record(self, event):
+        key = event["key"]
+        with self._lock:
+            for phase, seconds in event["phases"].items():
+                self._observe(key, phase, seconds)
+            if event["cached"]:
+                self.cache_hits[key] += 1
+            if event["error"] is not None:
+                self.errors[key] += 1
+            if event["status"] is not None:
+                self.requests[(key, event["status"])] += 1
+                self.retries[key] += event["retries"]
+            if event["bytes"] is not None:
+                histogram = self.sizes.get(key)
+                if histogram is None:
+                    histogram = self.sizes[key] = Histogram(self.bytes_buckets)
+                histogram.observe(event["bytes"])
+        for hook in self.hooks:
+            hook(event)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines += _render_histograms(
+                "wealthaccess_request_phase_seconds",
+                "Time spent in each phase of a request",
+                {
+                    f'endpoint="{key}",phase="{phase}"': histogram
+                    for (key, phase), histogram in sorted(self.phases.items())
+                },
+            )
+            lines += _render_histograms(
+                "wealthaccess_response_bytes",
+                "Size of response bodies",
+                {
+                    f'endpoint="{key}"': histogram
+                    for key, histogram in sorted(self.sizes.items())
+                },
+            )
+            lines += _render_counter(
+                "wealthaccess_requests_total",
+                "Responses received, by status code",
+                {
+                    f'endpoint="{key}",status="{status}"': count
+                    for (key, status), count in sorted(self.requests.items())
+                },
+            )
+            lines += _render_counter(
+                "wealthaccess_retries_total",
+                "Requests sent again after a throttled or failed attempt",
+                {f'endpoint="{key}"': n for key, n in sorted(self.retries.items())},
+            )
+            lines += _render_counter(
+                "wealthaccess_errors_total",
+                "Requests that raised an exception",
+                {f'endpoint="{key}"': n for key, n in sorted(self.errors.items())},
+            )
+            lines += _render_counter(
+                "wealthaccess_cache_hits_total",
+                "Requests answered from the cache",
+                {f'endpoint="{key}"': n for key, n in sorted(self.cache_hits.items())},
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(name, description, histograms):
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms.items():
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def _render_counter(name, description, counts):
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+    for labels, count in counts.items():
+        lines.append(f"{name}{{{labels}}} {count}")
+    return lines
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .private import get_data
+
+# Table and key fields for each endpoint mirrored
+TABLES = {
+    "Investors": ("investors", ("investorId",)),
+    "Accounts": ("accounts", ("accountId",)),
+    "Holdings": ("holdings", ("holdingId",)),
+    "Classifications": ("classifications", ("id",)),
+    "Diversifications": ("diversifications", ("id",)),
+    "Transactions": ("transactions", ("transactionId",)),
+}
+
+# Endpoints only asked for what's newer than the highest key stored
+INCREMENTAL = ("Transactions",)
+
+# Endpoints that take the ignoreOrion filter
+_ORION = ("Accounts", "Holdings", "Transactions")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _digest(record):
+    data = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BookMirror:
+    """
+    Local SQLite copy of an advisor's investors, accounts, holdings,
+    classifications, diversifications and transactions, for running SQL
+    against the book without pulling it through the API each time.
+
+    Each endpoint has a table keyed on its id field (see TABLES) with a
+    column for every top-level field, nested values stored as JSON text.
+    Columns are added as new fields show up.  A refresh fetches every
+    endpoint concurrently, compares a digest of each record with the one
+    stored and only writes the rows that were added or changed, deleting
+    the ones that are gone.  Transactions are never deleted: like
+    TransactionSync, only those with a transactionId above the highest one
+    stored are fetched.
+
+    A refresh is written in one database transaction, so readers never
+    see a half-applied refresh.  Use a different database than a
+    TransactionSync, which has its own transactions table.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file.  It's created when it doesn't exist.
+
+    Keyword Arguments
+    -----------------
+    client: Client, default None, optional
+        Client to make requests with.  The shared default client is used
+        when not given.
+    signer: Signer, default None, optional
+    tables: iterable, default TABLES, optional
+        Endpoint keys to mirror
+    keys: dict, default None, optional
+        Key fields by endpoint key, overriding those in TABLES
+    """
+
+    def __init__(self, path, client=None, signer=None, tables=TABLES, keys=None):
+        unknown = set(tables) - TABLES.keys()
+        if unknown:
+            raise ValueError(
+                f"Can't mirror {', '.join(sorted(unknown))}; "
+                f"choose from {', '.join(TABLES)}"
+            )
+        self.path = path
+        self.client = client
+        self.signer = signer
+        self.tables = {
+            key: (TABLES[key][0], tuple((keys or {}).get(key, TABLES[key][1])))
+            for key in tables
+        }
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS refreshes (
+                    name TEXT PRIMARY KEY,
+                    refreshed_at REAL NOT NULL
+                )
+                """
+            )
+            # At most one row, for the refresh_if_stale call under way
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims (claimed_at REAL NOT NULL)"
+            )
+            for table, key_fields in self.tables.values():
+                columns = ", ".join(f"{_quote(f)} NOT NULL" for f in key_fields)
+                primary_key = ", ".join(_quote(f) for f in key_fields)
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns}, "
+                    "_digest TEXT NOT NULL, _synced_at REAL NOT NULL, "
+                    f"PRIMARY KEY ({primary_key}))"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _columns(self, conn, table):
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _watermark(self, conn, table, key_fields):
+        row = conn.execute(
+            f"SELECT MAX({_quote(key_fields[0])}) FROM {_quote(table)}"
+        ).fetchone()
+        return row[0]
+
+    def _fetch(self, key, query_params):
+        return get_data(
+            key,
+            "GET",
+            query_params=dict(query_params, output="records"),
+            client=self.client,
+            signer=self.signer,
+        )
+
+    def _apply(self, conn, key, records, now):
+        table, key_fields = self.tables[key]
+        columns = self._columns(conn, table)
+        fields = {field for record in records for field in record}
+        for field in sorted(fields - set(columns)):
+            conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(field)}")
+            columns.append(field)
+        select = (
+            f"SELECT {', '.join(_quote(f) for f in key_fields)}, _digest "
+            f"FROM {_quote(table)}"
+        )
+        parameters = ()
+        # Incremental endpoints only return rows from around the watermark on
+        if key in INCREMENTAL:
+            low = min((r.get(key_fields[0]) for r in records), default=None)
+            select += f" WHERE {_quote(key_fields[0])} >= ?"
+            parameters = (low,)
+        stored = {
+            tuple(row[:-1]): row[-1] for row in conn.execute(select, parameters)
+        }
+        data = [c for c in columns if c not in ("_digest", "_synced_at")]
+        rows, seen = [], set()
+        inserted = updated = 0
+        for record in records:
+            try:
+                row_key = tuple(record[f] for f in key_fields)
+            except KeyError:
+                raise ValueError(
+                    f"{key} record is missing a key field {key_fields}; "
+                    "pass keys to choose others"
+                ) from None
+            seen.add(row_key)
+            digest = _digest(record)
+            previous = stored.get(row_key)
+            if previous == digest:
+                continue
+            if previous is None:
+                inserted += 1
+            else:
+                updated += 1
+            rows.append([_value(record.get(c)) for c in data] + [digest, now])
+        if rows:
+            names = data + ["_digest", "_synced_at"]
+            updates = ", ".join(
+                f"{_quote(c)} = excluded.{_quote(c)}"
+                for c in names
+                if c not in key_fields
+            )
+            conn.executemany(
+                f"INSERT INTO {_quote(table)} "
+                f"({', '.join(_quote(c) for c in names)}) "
+                f"VALUES ({', '.join('?' * len(names))}) "
+                f"ON CONFLICT ({', '.join(_quote(f) for f in key_fields)}) "
+                f"DO UPDATE SET {updates}",
+                rows,
+            )
+        deleted = 0
+        if key not in INCREMENTAL:
+            gone = [row_key for row_key in stored if row_key not in seen]
+            where = " AND ".join(f"{_quote(f)} = ?" for f in key_fields)
+            conn.executemany(f"DELETE FROM {_quote(table)} WHERE {where}", gone)
+            deleted = len(gone)
+        conn.execute(
+            "INSERT INTO refreshes VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET refreshed_at = excluded.refreshed_at",
+            (table, now),
+        )
+        return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+    def refresh(self, max_workers=6, **kwargs):
+        """
+        Fetch every mirrored endpoint and write the rows that changed.
+        Returns the counts of inserted, updated and deleted rows by table.
+
+        Keyword Arguments
+        -----------------
+        max_workers: int, default 6, optional
+            Endpoints fetched at once
+        ignoreOrion: bool, default False, optional
+            Passed to the accounts, holdings and transactions endpoints
+        Any other keyword argument is passed to the transactions endpoint,
+        e.g. startDate, which is only needed for the first refresh
+        """
+        orion = {k: kwargs.pop(k) for k in ("ignoreOrion",) if k in kwargs}
+        with self._connect() as conn:
+            watermarks = {
+                key: self._watermark(conn, *self.tables[key])
+                for key in INCREMENTAL
+                if key in self.tables
+            }
+        params = {}
+        for key in self.tables:
+            params[key] = dict(orion) if key in _ORION else {}
+            if key == "Transactions":
+                params[key].update(kwargs)
+            if watermarks.get(key) is not None:
+                params[key]["transactionId"] = watermarks[key]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(self._fetch, key, params[key])
+                for key in self.tables
+            }
+            results = {key: future.result() for key, future in futures.items()}
+        now = time.time()
+        counts = {}
+        with self._connect() as conn:
+            for key, records in results.items():
+                if isinstance(records, dict):
+                    records = [records]
+                counts[self.tables[key][0]] = self._apply(conn, key, records, now)
+        return counts
+
+    def refreshed_at(self):
+        """
+        Returns when each table was last refreshed, as a Unix time.
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT name, refreshed_at FROM refreshes"))
+
+    def _claim(self, max_age):
+        # BEGIN IMMEDIATE takes the write lock before reading, so the check
+        # and the claim can't interleave with another process's
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                refreshed = dict(
+                    conn.execute("SELECT name, refreshed_at FROM refreshes")
+                )
+                tables = [table for table, _ in self.tables.values()]
+                oldest = min((refreshed.get(t, 0) for t in tables), default=0)
+                claimed = conn.execute("SELECT MAX(claimed_at) FROM claims")
+                # A claim left by a process that died expires like a refresh
+                if now - max(oldest, claimed.fetchone()[0] or 0) < max_age:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute("DELETE FROM claims")
+                conn.execute("INSERT INTO claims VALUES (?)", (now,))
+                conn.execute("COMMIT")
+                return now
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def refresh_if_stale(self, max_age, **kwargs):
+        """
+        Refresh when any table is older than max_age seconds (or was never
+        refreshed), so tools sharing the database make at most one refresh
+        per interval.  Returns the refresh's counts, or None when the mirror
+        was fresh enough or another process is already refreshing it.
+
+        The check and a claim on the refresh are made in one write
+        transaction, so of several processes finding the mirror stale only
+        one refreshes it.  A claim is released when the refresh ends and
+        lapses after max_age if its process dies.
+        """
+        claimed_at = self._claim(max_age)
+        if claimed_at is None:
+            return None
+        try:
+            return self.refresh(**kwargs)
+        finally:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM claims WHERE claimed_at = ?", (claimed_at,))
+
+    def query(self, sql, parameters=()):
+        """
+        Returns the rows of a SQL query against the mirror.
+        """
+        with self._connect() as conn:
+            return conn.execute(sql, parameters).fetchall()
+
+
+def mirror_book(path, **kwargs):
+    """
+    Refresh the SQLite mirror of the advisor's book at path and return the
+    counts of inserted, updated and deleted rows by table.  See
+    `BookMirror`.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file
+
+    Keyword Arguments
+    -----------------
+    Passed through to `BookMirror.refresh`
+    """
+    return BookMirror(path).refresh(**kwargs)
@@ -0,0 +1,361 @@
+"""
+Compact typed records: `Holding`, `Account`, `Transaction`, `InvestorProfile`
+and `Document`.
+
+A model keeps the raw JSON values of its known fields in a single tuple
+(its only slot) and parses numbers, dates and booleans when they're read.
+`Model.from_records` builds a list of them straight from a decoded payload,
+and `Model.array` packs a payload into a `ModelArray` that stores numeric,
+date and boolean fields in typed arrays, for books too big to keep as
+objects.  `output="models"` returns a list of the endpoint's model.
+"""
+import math
+from array import array
+from datetime import date, datetime
+
+_BOOLEANS = {"true": True, "false": False, "True": True, "False": False}
+
+
+def _to_str(value):
+    return value
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def _to_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    return _BOOLEANS.get(value)
+
+
+def _to_date(value):
+    if not value or isinstance(value, date):
+        return value or None
+    return date.fromisoformat(value[:10])
+
+
+def _to_datetime(value):
+    if not value or isinstance(value, datetime):
+        return value or None
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+_PARSERS = {
+    "str": _to_str,
+    "int": _to_int,
+    "float": _to_float,
+    "bool": _to_bool,
+    "date": _to_date,
+    "datetime": _to_datetime,
+}
+
+
+def _field(index, parse):
+    def get(self):
+        return parse(self._values[index])
+
+    return property(get)
+
+
+class Model:
+    """
+    Base class for the typed records.  Subclasses list their FIELDS as
+    `(attribute, JSON key, type)` tuples, where type is one of "str", "int",
+    "float", "bool", "date" or "datetime".  Fields missing from a record
+    are None and keys not in FIELDS are dropped.
+
+    Arguments
+    ---------
+    record: dict, required
+        Decoded JSON record
+    """
+
+    __slots__ = ("_values",)
+
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._keys = tuple(key for _, key, _ in cls.FIELDS)
+        cls._attributes = tuple(attribute for attribute, _, _ in cls.FIELDS)
+        for index, (attribute, _, kind) in enumerate(cls.FIELDS):
+            setattr(cls, attribute, _field(index, _PARSERS[kind]))
+
+    def __init__(self, record):
+        self._values = tuple(record.get(key) for key in self._keys)
+
+    @classmethod
+    def _from_values(cls, values):
+        model = cls.__new__(cls)
+        model._values = values
+        return model
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Returns a list of models built from decoded JSON records.
+        """
+        keys = cls._keys
+        new = cls._from_values
+        return [new(tuple(record.get(key) for key in keys)) for record in records]
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Returns a list of models from a response's JSON payload.
+        """
+        response.raise_for_status()
+        records = response.json()
+        return cls.from_records([records] if isinstance(records, dict) else records)
+
+    @classmethod
+    def array(cls, records):
+        """
+        Returns a ModelArray packing the decoded JSON records into typed
+        columns.
+        """
+        return ModelArray(cls, records)
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{attribute}={getattr(self, attribute)!r}"
+            for attribute in self._attributes[:3]
+        )
+        return f"{type(self).__name__}({fields}, ...)"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        """
+        Returns the parsed fields by attribute name.
+        """
+        return {attribute: getattr(self, attribute) for attribute in self._attributes}
+
+
+# Typed array used for each type of field, with the value standing in for
+# None.  Other fields are kept in lists.
+_COLUMNS = {
+    "int": ("q", -(2 ** 63)),
+    "float": ("d", math.nan),
+    "bool": ("b", -1),
+    "date": ("i", 0),
+}
+
+
+class ModelArray:
+    """
+    Records of one model stored column by column: int, float, bool and date
+    fields in typed arrays (8, 8, 1 and 4 bytes a value) and every other
+    field in a list, with repeated strings stored once.  Indexing returns a
+    model built from the row.
+
+    Arguments
+    ---------
+    model: Model subclass, required
+    records: iterable of dict, required
+        Decoded JSON records
+    """
+
+    def __init__(self, model, records):
+        self.model = model
+        self.columns = {}
+        kinds = [kind for _, _, kind in model.FIELDS]
+        columns = []
+        for kind in kinds:
+            typecode = _COLUMNS[kind][0] if kind in _COLUMNS else None
+            columns.append(array(typecode) if typecode else [])
+        strings = [{} for _ in kinds]
+        parsers = [_PARSERS[kind] for kind in kinds]
+        missing = [_COLUMNS[kind][1] if kind in _COLUMNS else None for kind in kinds]
+        length = 0
+        for record in records:
+            for i, key in enumerate(model._keys):
+                value = parsers[i](record.get(key))
+                if kinds[i] == "date":
+                    value = value.toordinal() if value is not None else 0
+                elif kinds[i] == "bool":
+                    value = -1 if value is None else int(value)
+                elif value is None:
+                    value = missing[i]
+                elif isinstance(value, str):
+                    value = strings[i].setdefault(value, value)
+                columns[i].append(value)
+            length += 1
+        self._length = length
+        self._kinds = kinds
+        for attribute, column in zip(model._attributes, columns):
+            self.columns[attribute] = column
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self._row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ModelArray index out of range")
+        return self._row(index)
+
+    def _row(self, index):
+        values = []
+        for kind, column in zip(self._kinds, self.columns.values()):
+            value = column[index]
+            if kind == "date":
+                value = date.fromordinal(value) if value else None
+            elif kind == "bool":
+                value = None if value < 0 else bool(value)
+            elif kind == "float":
+                value = None if math.isnan(value) else value
+            elif kind == "int":
+                value = None if value == _COLUMNS["int"][1] else value
+            values.append(value)
+        return self.model._from_values(tuple(values))
+
+    def __repr__(self):
+        return f"ModelArray({self.model.__name__}, {self._length} records)"
+
+    def column(self, attribute):
+        """
+        Returns the array (or list) holding an attribute for every record.
+        Missing values are NaN for floats, 0 for date ordinals, -1 for
+        booleans and -2**63 for ints.
+        """
+        return self.columns[attribute]
+
+
+class Holding(Model):
+    __slots__ = ()
+
+    FIELDS = (
+        ("holding_id", "holdingId", "int"),
+        ("account_id", "accountId", "int"),
+        ("symbol", "symbol", "str"),
+        ("description", "description", "str"),
+        ("quantity", "quantity", "float"),
+        ("price", "price", "float"),
+        ("market_value", "marketValue", "float"),
+        ("cost_basis", "costBasis", "float"),
+        ("unit_cost", "unitCost", "float"),
+        ("as_of_date", "asOfDate", "date"),
+        ("price_date", "priceDate", "date"),
+        ("is_cash", "isCash", "bool"),
+    )
+
+
+class Account(Model):
+    __slots__ = ()
+
+    FIELDS = (
+        ("account_id", "accountId", "int"),
+        ("account_number", "accountNumber", "str"),
+        ("name", "name", "str"),
+        ("account_type", "accountType", "str"),
+        ("balance", "balance", "float"),
+        ("market_value", "marketValue", "float"),
+        ("cash_balance", "cashBalance", "float"),
+        ("open_date", "openDate", "date"),
+        ("close_date", "closeDate", "date"),
+        ("last_updated", "lastUpdated", "datetime"),
+        ("is_closed", "isClosed", "bool"),
+        ("is_manual", "isManual", "bool"),
+    )
+
+
+class Transaction(Model):
+    __slots__ = ()
+
+    FIELDS = (
+        ("transaction_id", "transactionId", "int"),
+        ("account_id", "accountId", "int"),
+        ("transaction_date", "transactionDate", "date"),
+        ("settlement_date", "settlementDate", "date"),
+        ("posted_date", "postedDate", "date"),
+        ("transaction_type", "transactionType", "str"),
+        ("description", "description", "str"),
+        ("symbol", "symbol", "str"),
+        ("amount", "amount", "float"),
+        ("quantity", "quantity", "float"),
+        ("price", "price", "float"),
+        ("fee", "fee", "float"),
+        ("is_transfer", "isTransfer", "bool"),
+        ("is_pending", "isPending", "bool"),
+    )
+
+
+class InvestorProfile(Model):
+    __slots__ = ()
+
+    FIELDS = (
+        ("investor_id", "investorId", "int"),
+        ("client_identifier", "clientIdentifier", "str"),
+        ("first_name", "firstName", "str"),
+        ("last_name", "lastName", "str"),
+        ("email", "email", "str"),
+        ("phone", "phone", "str"),
+        ("date_of_birth", "dateOfBirth", "date"),
+    )
+
+
+class Document(Model):
+    __slots__ = ()
+
+    FIELDS = (
+        ("vault_file_id", "vaultFileId", "int"),
+        ("parent_id", "parentId", "int"),
+        ("name", "name", "str"),
+        ("is_folder", "isFolder", "bool"),
+        ("size", "size", "int"),
+        ("created_date", "createdDate", "datetime"),
+        ("modified_date", "modifiedDate", "datetime"),
+    )
+
+
+# Model returned by each endpoint key for output="models"
+MODELS = {
+    "Accounts": Account,
+    "InvestorAccounts": Account,
+    "Holdings": Holding,
+    "AdvisorInvestorHoldings": Holding,
+    "AdvisorInvestorDiversificationHoldings": Holding,
+    "Transactions": Transaction,
+    "AdvisorInvestorTransactions": Transaction,
+    "AdvisorInvestorBankTransactions": Transaction,
+    "AdvisorInvestorBrokerageTransactions": Transaction,
+    "InvestorAccountTransactions": Transaction,
+    "AdvisorInvestorProfile": InvestorProfile,
+    "InvestorProfile": InvestorProfile,
+    "Investors": InvestorProfile,
+    "FirmInvestors": InvestorProfile,
+    "AdvisorInvestorDocumentsList": Document,
+}
+
+
+def model_for(key):
+    """
+    Returns the model for an endpoint key.
+    """
+    try:
+        return MODELS[key]
+    except KeyError:
+        raise ValueError(f"There's no model for {key!r} responses") from None
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import get_client
+from .private import get_data
+
+# Endpoint key behind each part of a snapshot
+PARTS = {
+    "profile": "AdvisorInvestorProfile",
+    "holdings": "AdvisorInvestorHoldings",
+    "diversification_holdings": "AdvisorInvestorDiversificationHoldings",
+    "transactions": "AdvisorInvestorTransactions",
+    "bank_transactions": "AdvisorInvestorBankTransactions",
+    "brokerage_transactions": "AdvisorInvestorBrokerageTransactions",
+    "documents": "AdvisorInvestorDocumentsList",
+}
+
+DEFAULT_PARTS = (
+    "profile",
+    "holdings",
+    "diversification_holdings",
+    "transactions",
+    "bank_transactions",
+    "documents",
+)
+
+
+class InvestorSnapshot:
+    """
+    Decoded results of the requested parts for one investor.  Each part is
+    an attribute, e.g. `snapshot.holdings`, which is None when the part
+    wasn't requested or its request failed.
+
+    Arguments
+    ---------
+    investor_id: int, required
+    data: dict, required
+        Decoded JSON by part name
+    errors: dict, default None, optional
+        Exception raised by part name, for the parts that failed
+    """
+
+    def __init__(self, investor_id, data, errors=None):
+        self.investor_id = investor_id
+        self.errors = errors or {}
+        self.parts = tuple(data)
+        for part in PARTS:
+            setattr(self, part, data.get(part))
+
+    def __repr__(self):
+        return (
+            f"InvestorSnapshot({self.investor_id!r}, parts={list(self.parts)}, "
+            f"errors={list(self.errors)})"
+        )
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def raise_for_errors(self):
+        """
+        Raise the first exception any part failed with.
+        """
+        for error in self.errors.values():
+            raise error
+
+    def to_dict(self):
+        return {part: getattr(self, part) for part in self.parts}
+
+
+def _check_parts(parts):
+    unknown = set(parts) - PARTS.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown snapshot parts {', '.join(sorted(unknown))}; "
+            f"choose from {', '.join(PARTS)}"
+        )
+    return tuple(parts)
+
+
+def get_investor_snapshot(
+    investor_id, parts=DEFAULT_PARTS, client=None, signer=None, **kwargs
+):
+    """
+    Fetches the requested parts of an investor's data (profile, holdings,
+    transactions, documents, ...) concurrently over one pooled client, so
+    the call takes about as long as the slowest part rather than the sum of
+    them all.
+
+    A failed part doesn't fail the snapshot: its attribute is None and the
+    exception is kept in `errors`.
+
+    Arguments
+    ---------
+    investor_id: int
+        Investor specified by the investorId returned from the investors
+        endpoint.
+    parts: iterable, default DEFAULT_PARTS, optional
+        Names from PARTS to fetch
+
+    Keyword Arguments
+    -----------------
+    Query parameters, e.g. startDate or ignoreOrion, passed to every part
+    whose endpoint accepts them
+    """
+    parts = _check_parts(parts)
+    client = client or get_client()
+    query_params = dict(kwargs, output="records")
+
+    def fetch(part):
+        return get_data(
+            PARTS[part],
+            "GET",
+            uri_params={"investor_id": investor_id},
+            query_params=query_params,
+            client=client,
+            signer=signer,
+        )
+
+    data, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(len(parts), 1)) as executor:
+        futures = {part: executor.submit(fetch, part) for part in parts}
+        for part, future in futures.items():
+            try:
+                data[part] = future.result()
+            except Exception as e:
+                data[part] = None
+                errors[part] = e
+    return InvestorSnapshot(investor_id, data, errors)
@@ -0,0 +1,138 @@
+import codecs
+import json
+
+from .private import get_data
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally parse a JSON document arriving in chunks, yielding each
+    element of its top-level array as soon as it's complete.  A document
+    that isn't an array is yielded whole.
+
+    Only the element being parsed (plus one chunk) is ever held in memory.
+
+    Arguments
+    ---------
+    chunks: iterable of bytes or str, required
+    """
+    chunks = iter(chunks)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    finished = False
+
+    def more():
+        # Append the next chunk to the buffer, returning False at the end
+        nonlocal buffer, pos, finished
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = utf8.decode(chunk)
+            if chunk:
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                return True
+        finished = True
+        buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        pos = 0
+        return False
+
+    def skip(characters):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in characters:
+                pos += 1
+            if pos < len(buffer) or not more():
+                return
+
+    skip(_WHITESPACE)
+    if pos >= len(buffer):
+        return
+    if buffer[pos] != "[":
+        while more():
+            pass
+        yield json.loads(buffer[pos:])
+        return
+    pos += 1
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON array")
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise
+            continue
+        # A number or literal is only complete once the character after it
+        # has arrived, otherwise it may continue in the next chunk
+        if not isinstance(value, (dict, list, str)) and not finished:
+            if end == len(buffer) or buffer[end] not in _WHITESPACE + ",]":
+                if more():
+                    continue
+        pos = end
+        yield value
+
+
+def iter_records(response, chunk_size=65536):
+    """
+    Yields each record of a streamed response's top-level JSON array, then
+    closes the response.
+
+    Arguments
+    ---------
+    response: requests.Response, required
+        Response to a request made with stream=True
+
+    Keyword Arguments
+    -----------------
+    chunk_size: int, default 65536, optional
+        Bytes read from the socket at a time
+    """
+    try:
+        response.raise_for_status()
+        yield from iter_json_array(response.iter_content(chunk_size=chunk_size))
+    finally:
+        response.close()
+
+
+def stream_data(key, method, uri_params={}, query_params={}, client=None):
+    """
+    Like `get_data`, but the body is read as it arrives and each record of
+    its top-level array is yielded one at a time, so memory stays flat no
+    matter how big the response is.
+    """
+    response = get_data(
+        key, method, uri_params, query_params, client=client, stream=True
+    )
+    return iter_records(response)
+
+
+def iter_advisor_accounts(**kwargs):
+    """
+    Yields the accounts for a given advisor one at a time as the response
+    streams in.  Takes the same keyword arguments as `get_advisor_accounts`.
+    """
+    return stream_data("Accounts", "GET", query_params=kwargs)
+
+
+def iter_advisor_holdings(**kwargs):
+    """
+    Yields the holdings for a given advisor one at a time as the response
+    streams in.  Takes the same keyword arguments as `get_advisor_holdings`.
+    """
+    return stream_data("Holdings", "GET", query_params=kwargs)
+
+
+def iter_advisor_transactions(**kwargs):
+    """
+    Yields the transactions for all investors under an advisor one at a time
+    as the response streams in.  Takes the same keyword arguments as
+    `get_advisor_transactions`.
+    """
+    return stream_data("Transactions", "GET", query_params=kwargs)
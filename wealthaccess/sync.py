@@ -0,0 +1,164 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from .private import get_data
+
+
+class TransactionSync:
+    """
+    Keeps a local SQLite copy of an advisor's transactions up to date.
+
+    The highest transactionId stored is kept as a watermark, and each sync
+    only asks the transactions endpoint for transactions greater than it.
+    New transactions are upserted and the watermark advanced in the same
+    database transaction, so a crash never leaves them out of step.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file.  It's created when it doesn't exist.
+
+    Keyword Arguments
+    -----------------
+    name: str, default "transactions", optional
+        Name of the checkpoint, for keeping several advisors (or filters) in
+        one database
+    client: Client, default None, optional
+        Client to make requests with.  The shared default client is used
+        when not given.
+    id_field: str, default "transactionId", optional
+        Field holding each transaction's id
+    """
+
+    def __init__(
+        self, path, name="transactions", client=None, id_field="transactionId"
+    ):
+        self.path = path
+        self.name = name
+        self.client = client
+        self.id_field = id_field
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    name TEXT PRIMARY KEY,
+                    watermark INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transactions (
+                    name TEXT NOT NULL,
+                    transaction_id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (name, transaction_id)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def watermark(self):
+        """
+        Highest transactionId synced so far, None before the first sync.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark FROM checkpoints WHERE name = ?", (self.name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync(self, **kwargs):
+        """
+        Fetch the transactions newer than the watermark, store them and
+        advance the watermark.  Returns the transactions fetched.
+
+        Keyword Arguments
+        -----------------
+        Passed through to the transactions endpoint (e.g. ignoreOrion),
+        except output: the transactions are always returned as records.  A
+        startDate is only needed for the first sync.
+        """
+        if "output" in kwargs:
+            raise TypeError("sync() got an unexpected keyword argument 'output'")
+        watermark = self.watermark
+        query_params = dict(kwargs, output="records")
+        if watermark is not None:
+            query_params["transactionId"] = watermark
+        transactions = get_data(
+            "Transactions", "GET", query_params=query_params, client=self.client
+        )
+        if not transactions:
+            return transactions
+        rows = [
+            (self.name, int(t[self.id_field]), json.dumps(t)) for t in transactions
+        ]
+        highest = max(row[1] for row in rows)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO transactions VALUES (?, ?, ?) "
+                "ON CONFLICT (name, transaction_id) "
+                "DO UPDATE SET data = excluded.data",
+                rows,
+            )
+            # Never move the watermark back if another process got further
+            conn.execute(
+                "INSERT INTO checkpoints VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "watermark = MAX(watermark, excluded.watermark), "
+                "updated_at = excluded.updated_at",
+                (self.name, highest, time.time()),
+            )
+        return transactions
+
+    def transactions(self):
+        """
+        Yields every stored transaction in transactionId order.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT data FROM transactions WHERE name = ? "
+                "ORDER BY transaction_id",
+                (self.name,),
+            )
+            for (data,) in cursor:
+                yield json.loads(data)
+
+    def reset(self):
+        """
+        Forget the watermark and every stored transaction.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM transactions WHERE name = ?", (self.name,))
+            conn.execute("DELETE FROM checkpoints WHERE name = ?", (self.name,))
+
+
+def sync_advisor_transactions(path, **kwargs):
+    """
+    Fetch the advisor transactions newer than those already stored in the
+    SQLite database at path, store them and return them.  See
+    `TransactionSync`.
+
+    Arguments
+    ---------
+    path: str, required
+        Path to the database file
+
+    Keyword Arguments
+    -----------------
+    Passed through to the transactions endpoint
+    """
+    return TransactionSync(path).sync(**kwargs)
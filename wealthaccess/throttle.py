@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests a second on average
+    with bursts of up to `burst`.
+
+    Arguments
+    ---------
+    rate: float, required
+        Requests a second
+    burst: int, default rate, optional
+        Requests allowed back to back after the bucket has been idle
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait_for(self, tokens):
+        # Reserve the tokens (going negative if needed) and return how long
+        # the caller has to wait for them, so waiters are served in order
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self):
+        wait = self._wait_for(1)
+        if wait:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Hold every caller back for at least the given number of seconds.
+        """
+        with self._lock:
+            # Credited up to now first, or the next caller would be refilled
+            # for the time since the last acquire and skip the pause
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Keeps requests under a global budget and optional per-endpoint budgets.
+
+    Keyword Arguments
+    -----------------
+    rate: float, default None, optional
+        Requests a second across every endpoint, None for no global limit
+    burst: int, default rate, optional
+        Requests allowed back to back across every endpoint
+    per_endpoint: dict, default None, optional
+        Budgets by endpoint key, either a rate or a (rate, burst) tuple,
+        e.g. {"AdvisorInvestorHoldings": (5, 10)}
+    """
+
+    def __init__(self, rate=None, burst=None, per_endpoint=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.endpoints = {}
+        for key, budget in (per_endpoint or {}).items():
+            if not isinstance(budget, (tuple, list)):
+                budget = (budget,)
+            self.endpoints[key] = TokenBucket(*budget)
+
+    def _buckets(self, key):
+        return [b for b in (self.endpoints.get(key), self.bucket) if b is not None]
+
+    def acquire(self, key):
+        for bucket in self._buckets(key):
+            bucket.acquire()
+
+    def pause(self, key, seconds):
+        """
+        Hold back every request sharing a budget with the endpoint key, e.g.
+        after the server asked to wait with Retry-After.
+        """
+        for bucket in self._buckets(key):
+            bucket.pause(seconds)
+
+
+class Retry:
+    """
+    When and how long to wait before sending a failed request again.
+
+    Waits grow exponentially with full jitter, unless the response has a
+    Retry-After header, which is honored.  A request the server asks to
+    wait longer than max_backoff for isn't retried.
+
+    Keyword Arguments
+    -----------------
+    total: int, default 3, optional
+        Maximum number of retries
+    backoff_factor: float, default 0.5, optional
+        Base wait, in seconds; the nth retry waits a random time up to
+        backoff_factor * 2 ** n
+    max_backoff: float, default 60, optional
+        Longest wait, in seconds, before giving up
+    statuses: tuple, default (429, 500, 502, 503, 504), optional
+        Status codes that are retried
+    methods: tuple, default ("GET",), optional
+        Methods that are retried
+    """
+
+    def __init__(
+        self,
+        total=3,
+        backoff_factor=0.5,
+        max_backoff=60,
+        statuses=(429, 500, 502, 503, 504),
+        methods=("GET",),
+    ):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+
+    def is_retryable(self, method, attempt, response=None):
+        if attempt >= self.total or method not in self.methods:
+            return False
+        return response is None or response.status_code in self.statuses
+
+    def retry_after(self, response):
+        """
+        Seconds the server asked to wait, or None
+        """
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt, response=None):
+        """
+        Seconds to wait before the next attempt, or None when the server
+        asked to wait longer than max_backoff
+        """
+        wait = self.retry_after(response)
+        if wait is None:
+            return min(
+                random.uniform(0, self.backoff_factor * 2 ** attempt),
+                self.max_backoff,
+            )
+        return wait if wait <= self.max_backoff else None